@@ -0,0 +1 @@
+"""Benchmarks of the hot paths. Run them from backend/ with python -m benchmarks.<name>."""
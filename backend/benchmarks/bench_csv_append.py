@@ -0,0 +1,81 @@
+"""
+Benchmark of appending new tracks to the CSV.
+
+The write_dict loop is how NewTrackService.add_new_tracks wrote tracks
+before add_many: the file and the header are checked and the CSV is opened once per track.
+Both write to temporary files, which are checked to be byte-identical.
+
+    python -m benchmarks.bench_csv_append [--rows 10000] [--logging]
+"""
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+from models.new_track import NewTrackModel
+from repositories.new_track.csv import CsvNewTrackRepository
+from repositories.new_track.csv_index import CsvUrlIndex
+import utils.setting as setting
+from utils.logger import SetUpLogging
+
+
+class TempCsvRepository(CsvNewTrackRepository):
+    """A CSV repository on a given path instead of the one in the config."""
+
+    def __init__(self, path: str):
+        self.model = NewTrackModel()
+        self.columns = self.model.get_columns()
+        self.path = path
+        self.index = CsvUrlIndex(path)
+
+
+def track(i: int) -> NewTrackModel:
+    return NewTrackModel(f'Track {i}', f'Artist {i}', 'Release Radar',
+                         f'https://open.spotify.com/track/TR{i:020d}',
+                         'https://open.spotify.com/playlist/37i9dQZEVXbeLuAbNZXcPN',
+                         '2024-01-05', '2024-01-08T00:00:00Z', '2024-01-08', False)
+
+
+def write_dict_loop(repo: CsvNewTrackRepository, tracks: list) -> None:
+    for t in tracks:
+        repo.write_dict(t.get_dict())
+    return None
+
+
+def add_many(repo: CsvNewTrackRepository, tracks: list) -> None:
+    repo.add_many(tracks)
+    return None
+
+
+def timed(func, repo: CsvNewTrackRepository, tracks: list) -> float:
+    start = time.perf_counter()
+    func(repo, tracks)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--logging', action='store_true',
+                        help=f'Set up logging with {setting.LOG_CONFIG_PATH} as the app does')
+    args = parser.parse_args()
+
+    if args.logging:
+        SetUpLogging.setup_logging(setting.LOG_CONFIG_PATH)
+
+    tracks = [track(i) for i in range(args.rows)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        loop_repo = TempCsvRepository(os.path.join(tmp_dir, 'write_dict.csv'))
+        many_repo = TempCsvRepository(os.path.join(tmp_dir, 'add_many.csv'))
+        loop_time = timed(write_dict_loop, loop_repo, tracks)
+        many_time = timed(add_many, many_repo, tracks)
+        assert filecmp.cmp(loop_repo.path, many_repo.path, shallow=False)
+
+    print(f'Append {args.rows:,} rows, logging {"from the config" if args.logging else "not configured"}')
+    print(f'write_dict loop  {loop_time:.3f}s')
+    print(f'add_many         {many_time:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
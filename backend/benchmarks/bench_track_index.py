@@ -0,0 +1,67 @@
+"""
+Benchmark of splitting incoming tracks into unique and duplicate against the history.
+
+The list scan is the loop of retrieve_unique_and_duplicate_tracks_dict before
+TrackIndex, and is kept here as the reference.
+
+    python -m benchmarks.bench_track_index [--incoming 1000] [--history 10000 100000 1000000]
+"""
+import argparse
+import time
+
+from utils.track_index import TrackIndex
+
+
+def track(i: int) -> dict:
+    return {'name': f'Track {i}', 'track_url': f'https://open.spotify.com/track/TR{i:020d}'}
+
+
+def list_scan(tracks: list, from_tracks: list) -> tuple:
+    from_track_urls = [t['track_url'] for t in from_tracks]
+    unique_tracks = []
+    duplicate_tracks = []
+    for t in tracks:
+        if t['track_url'] in from_track_urls:
+            duplicate_tracks.append(t)
+        else:
+            unique_tracks.append(t)
+    return unique_tracks, duplicate_tracks
+
+
+def track_index(tracks: list, from_tracks: list) -> tuple:
+    return TrackIndex(from_tracks).partition(tracks)
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incoming', type=int, default=1000)
+    parser.add_argument('--history', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--max-scan', type=int, default=100000,
+                        help='Histories larger than this are not list scanned, it takes minutes')
+    args = parser.parse_args()
+
+    print(f'{args.incoming:,} incoming tracks, half of them in the history')
+    print(f'{"history":>10}  {"list scan":>10}  {"TrackIndex":>10}')
+    for size in args.history:
+        from_tracks = [track(i) for i in range(size)]
+        # Half of the incoming tracks are new, the other half spread over the history
+        tracks = [track(size + i) if i % 2 else track(i * size // args.incoming) for i in range(args.incoming)]
+
+        index_time, index_result = timed(track_index, tracks, from_tracks)
+        if size <= args.max_scan:
+            scan_time, scan_result = timed(list_scan, tracks, from_tracks)
+            assert scan_result == index_result
+            scan = f'{scan_time:9.3f}s'
+        else:
+            scan = 'skipped'
+        print(f'{size:>10,}  {scan:>10}  {index_time:9.3f}s')
+
+
+if __name__ == '__main__':
+    main()
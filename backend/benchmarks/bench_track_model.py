@@ -0,0 +1,127 @@
+"""
+Benchmark of building tracks from rows: construction time and memory.
+
+LegacyTrackModel is NewTrackModel before __slots__, built with
+NewTrackModel() + set_columns as the repositories did, and is kept here as the reference.
+Memory is what tracemalloc counts for the built tracks, without the rows.
+
+    python -m benchmarks.bench_track_model [--tracks 100000] [--logging]
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+from models.new_track import NewTrackModel
+from models.track_batch import TrackBatch
+import utils.setting as setting
+from utils.logger import SetUpLogging
+
+logger_pro = logging.getLogger('production')
+
+
+class LegacyTrackModel():
+    def __init__(self):
+        self.name = None
+        self.artist = None
+        self.playlist_name = None
+        self.track_url = None
+        self.playlist_url = None
+        self.release_date = None
+        self.added_at = None
+        self.created_at = None
+        self.like = None
+
+    def get_dict(self) -> dict:
+        logger_pro.debug({
+            'action': 'Get track dict data.',
+            'status': 'Run',
+            'message': ''
+        })
+        track = {c: getattr(self, c) for c in NewTrackModel.COLUMNS}
+        logger_pro.debug({
+            'action': 'Get track dict data.',
+            'status': 'Success',
+            'message': '',
+            'track': track
+        })
+        return track
+
+    def set_columns(self, tracks_dict: dict) -> None:
+        logger_pro.debug({
+            'action': 'Set dict data up columns.',
+            'status': 'Run',
+            'message': ''
+        })
+        for c in NewTrackModel.COLUMNS:
+            setattr(self, c, tracks_dict[c])
+        logger_pro.debug({
+            'action': 'Set dict data up columns.',
+            'status': 'Success',
+            'message': ''
+        })
+        return None
+
+
+def row(i: int) -> tuple:
+    return (f'Track {i}', f'Artist {i}', 'Release Radar',
+            f'https://open.spotify.com/track/TR{i:020d}',
+            'https://open.spotify.com/playlist/37i9dQZEVXbeLuAbNZXcPN',
+            '2024-01-05', '2024-01-08T00:00:00Z', '2024-01-08', 'False')
+
+
+def legacy_set_columns(rows: list) -> list:
+    tracks = []
+    for r in rows:
+        track = LegacyTrackModel()
+        track.set_columns(dict(zip(NewTrackModel.COLUMNS, r)))
+        tracks.append(track)
+    return tracks
+
+
+def from_row(rows: list) -> list:
+    return [NewTrackModel.from_row(r) for r in rows]
+
+
+def track_batch(rows: list) -> TrackBatch:
+    return TrackBatch.from_rows(rows)
+
+
+def measure(build, rows: list) -> tuple:
+    # tracemalloc slows allocations down, so the memory is measured on a second build
+    tracemalloc.start()
+    tracks = build(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tracks
+
+    start = time.perf_counter()
+    tracks = build(rows)
+    elapsed = time.perf_counter() - start
+    # Time with get_dict, which every write and export calls per track
+    start = time.perf_counter()
+    for t in tracks:
+        t.get_dict()
+    return elapsed, size, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tracks', type=int, default=100000)
+    parser.add_argument('--logging', action='store_true',
+                        help=f'Set up logging with {setting.LOG_CONFIG_PATH} as the app does')
+    args = parser.parse_args()
+
+    if args.logging:
+        SetUpLogging.setup_logging(setting.LOG_CONFIG_PATH)
+
+    rows = [row(i) for i in range(args.tracks)]
+    print(f'Build {args.tracks:,} tracks from rows, logging {"from the config" if args.logging else "not configured"}')
+    print(f'{"":16}  {"build":>8}  {"memory":>9}  {"get_dict":>8}')
+    for name, build in (('old set_columns', legacy_set_columns), ('from_row', from_row), ('TrackBatch', track_batch)):
+        elapsed, size, dict_time = measure(build, rows)
+        print(f'{name:16}  {elapsed:7.3f}s  {size / 1e6:6.1f} MB  {dict_time:7.3f}s')
+
+
+if __name__ == '__main__':
+    main()
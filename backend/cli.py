@@ -0,0 +1,186 @@
+"""Non-interactive command line, e.g. for cron."""
+import argparse
+import json
+import logging
+import sys
+import time
+
+import utils.http as http
+import utils.response_cache as response_cache
+import utils.setting as setting
+import utils.rate_limiter as rate_limiter
+from utils.clock import get_clock
+from utils.logger import SetUpLogging, get_logger
+
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class Cli(object):
+    """
+        A class used to run one action of the app without any prompt.
+
+            python main.py add-new [--dry-run]
+            python main.py now-playing
+            python main.py remove-listened [--yes] [--dry-run]
+            python main.py remove-range FIRST LAST [--yes] [--dry-run]
+            python main.py sync-liked [--full] [--dry-run]
+            python main.py export PATH
+
+        When the action finishes, a JSON summary is printed as the last line
+        on stdout, e.g.
+        {"action": "add-new", "status": "Success", "elapsed_sec": 3.21, "count": 12, ...}
+        With export -, the CSV is written on stdout and the summary and
+        the console log go to stderr.
+        The exit status is 0 on success and 1 on failure.
+
+        Methods
+        ------
+    """
+    COMMANDS = ('add-new', 'now-playing', 'remove-listened', 'remove-range', 'sync-liked', 'export')
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def is_command(cls, argv: list) -> bool:
+        return any(a in cls.COMMANDS for a in argv)
+
+    @classmethod
+    def build_parser(cls) -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(prog='main.py', description='New tracks')
+        # Read by utils.arguments, listed here for --help
+        parser.add_argument('--env', help='dev uses the test playlist and CSV')
+        subparsers = parser.add_subparsers(dest='command', required=True)
+
+        p = subparsers.add_parser('add-new', help='add new tracks to the playlist, CSV and GSS')
+        p.add_argument('--dry-run', action='store_true', help='only show the tracks to add')
+
+        subparsers.add_parser('now-playing', help='show the track you are listening now')
+
+        p = subparsers.add_parser('remove-listened', help='remove tracks you listened recently')
+        p.add_argument('--yes', action='store_true', help='remove without asking')
+        p.add_argument('--dry-run', action='store_true', help='only show the tracks to remove')
+
+        p = subparsers.add_parser('remove-range', help='remove tracks between two track numbers')
+        p.add_argument('first', type=int, help='a track number (first)')
+        p.add_argument('last', type=int, help='a track number (last)')
+        p.add_argument('--yes', action='store_true', help='remove without asking')
+        p.add_argument('--dry-run', action='store_true', help='only show the tracks to remove')
+
+        p = subparsers.add_parser('sync-liked', help='add liked tracks to the CSV and GSS')
+        p.add_argument('--dry-run', action='store_true', help='only show the tracks to add')
+        p.add_argument('--full', action='store_true', help='ignore the watermark and reconcile every saved track')
+
+        p = subparsers.add_parser('export', help='export the track history to a CSV')
+        p.add_argument('path', help="a path of the CSV, '-' for stdout")
+        return parser
+
+    def run(self, argv: list = None) -> int:
+        """
+            Run an action.
+
+            Parameters
+            ----------
+            argv: list
+                Command line arguments. sys.argv[1:] by default.
+
+            Raises
+            ------
+            None
+                A failure is logged and reported on the summary.
+
+            Return
+            ------
+            exit_status: int
+                0 on success, 1 on failure.
+        """
+        args = self.build_parser().parse_args(argv)
+
+        SetUpLogging().setup_logging(setting.LOG_CONFIG_PATH)
+        # export - writes the CSV on stdout, so everything else goes to stderr
+        out = sys.stdout
+        if args.command == 'export' and args.path == '-':
+            out = sys.stderr
+            self.move_console_to(out)
+        get_clock().start()
+        logger_pro.info({
+            'action': 'Run a command',
+            'status': 'Run',
+            'message': '',
+            'data': vars(args)
+        })
+
+        # Imported here, so that --help does not load the services
+        from controllers.new_track_controller import NewTrackController
+        controller = NewTrackController()
+
+        summary = {
+            'action': args.command,
+            'status': 'Success',
+            'dry_run': getattr(args, 'dry_run', False),
+            'count': None,
+            'elapsed_sec': None,
+            'api': None,
+            'http': None,
+            'cache': None,
+            'error': None
+        }
+        start = time.perf_counter()
+        try:
+            summary['count'] = self.dispatch(controller, args)
+        except Exception as e:
+            summary['status'] = 'Fail'
+            summary['error'] = repr(e)
+            logger_pro.error({
+                'action': 'Run a command',
+                'status': 'Fail',
+                'message': args.command,
+                'exception': e
+            })
+        summary['elapsed_sec'] = round(time.perf_counter() - start, 3)
+        summary['api'] = {
+            name: {
+                'calls': sum(c['calls'] for c in endpoints.values()),
+                'retries': sum(c['retries'] for c in endpoints.values()),
+                'errors': sum(c['errors'] for c in endpoints.values())
+            }
+            for name, endpoints in rate_limiter.stats().items()
+        }
+        summary['http'] = http.stats()
+        summary['cache'] = response_cache.stats()
+
+        logger_pro.info({
+            'action': 'Run a command',
+            'status': summary['status'],
+            'message': '',
+            'data': summary
+        })
+        print(json.dumps(summary, ensure_ascii=False), file=out, flush=True)
+        return 0 if summary['status'] == 'Success' else 1
+
+    @classmethod
+    def move_console_to(cls, stream) -> None:
+        # The console logger writes on stdout (config/logging_config.yaml)
+        for handler in logging.getLogger('console').handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
+                handler.setStream(stream)
+        return None
+
+    def dispatch(self, controller, args) -> int:
+        if args.command == 'add-new':
+            return controller.add_new_tracks(dry_run=args.dry_run)
+        if args.command == 'now-playing':
+            controller.show_current_track_from_csv()
+            return None
+        if args.command == 'remove-listened':
+            return controller.remove_current_tracks(assume_yes=args.yes, dry_run=args.dry_run)
+        if args.command == 'remove-range':
+            return controller.remove_tracks_by_index(args.first, args.last,
+                                                     assume_yes=args.yes, dry_run=args.dry_run)
+        if args.command == 'sync-liked':
+            return controller.retreave_liked_tracks(dry_run=args.dry_run, full=args.full)
+        if args.command == 'export':
+            return controller.export(args.path)
+        raise ValueError(f'Unknown command: {args.command}')
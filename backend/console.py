@@ -2,11 +2,13 @@ import logging
 
 import utils.setting as setting
 import utils.helper as helper
-from utils.logger import SetUpLogging
+import utils.rate_limiter as rate_limiter
+from utils.clock import get_clock
+from utils.logger import SetUpLogging, get_logger
 from controllers.new_track_controller import NewTrackController
 
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -17,6 +19,8 @@ class Console(object):
     def start(self) -> None:
         # Init logger
         SetUpLogging().setup_logging(setting.LOG_CONFIG_PATH)
+        # Fix the date of this run
+        get_clock().start()
         logger_pro.info('Start app')
         while True:
             print('[1]: add new tracks')
@@ -54,7 +58,14 @@ class Console(object):
         elif user_input == 5:
             new_track_controller.podcasts()
         elif user_input == 6:
-            pass
+            path = input('Enter a path of CSV to export: ')
+            new_track_controller.export(path)
 
+        logger_pro.info({
+            'action': 'Show API calls per endpoint',
+            'status': 'Success',
+            'message': '',
+            'data': rate_limiter.stats()
+        })
         logger_pro.info('End app')
         return
@@ -6,8 +6,10 @@ import utils.helper as helper
 import utils.connect as connect
 from services.new_track_service import NewTrackService
 from services.liked_track_service import LikedTrackService
+from utils.logger import get_logger
+from utils.track_index import TrackIdentityIndex
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -18,12 +20,15 @@ class NewTrackController():
     def __init__(self, env: str = 'pro'):
         pass
 
-    def add_new_tracks(self) -> None:
+    def add_new_tracks(self, dry_run: bool = False, history_index=None) -> int:
         """ Add new tracks
 
         Parameters
         ----------
-        None
+        dry_run: bool
+            Find new tracks without adding them anywhere.
+        history_index: TrackIndex
+            An index of the track history kept by the caller. If None, the history is read.
 
         Raises
         ------
@@ -31,12 +36,12 @@ class NewTrackController():
 
         Return
         ------
-        None
+        new_tracks_len: int
+            The number of new tracks (to be) added.
         """
         connect.set_up()
         new_track_service = NewTrackService()
-        new_track_service.add_new_tracks()
-        return
+        return new_track_service.add_new_tracks(dry_run=dry_run, history_index=history_index)
 
     def show_current_track_from_csv(self) -> None:
         connect.set_up_spotify()
@@ -44,57 +49,120 @@ class NewTrackController():
         new_track_service.show_current_track()
         return
 
-    def remove_current_tracks(self) -> None:
+    def remove_current_tracks(self, assume_yes: bool = False, dry_run: bool = False) -> int:
         connect.set_up_spotify()
         new_track_service = NewTrackService()
-        new_track_service.remove_current_tracks()
-        return
+        return new_track_service.remove_current_tracks(assume_yes=assume_yes, dry_run=dry_run)
 
-    def remove_tracks_by_index(self, first, last) -> None:
+    def remove_tracks_by_index(self, first, last, assume_yes: bool = False, dry_run: bool = False) -> int:
         f = int(first)
         l = int(last)
         connect.set_up_spotify()
         new_track_service = NewTrackService()
-        new_track_service.remove_tracks_by_index(f, l)
+        return new_track_service.remove_tracks_by_index(f, l, assume_yes=assume_yes, dry_run=dry_run)
 
-        return
+    def export(self, path: str) -> int:
+        """ Export the track history to a CSV
 
-    def retreave_liked_tracks(self):
-        connect.set_up()
-        liked_track_service = LikedTrackService()
-        tracks_from_spotify = liked_track_service.retreave_liked_tracks()
+        Parameters
+        ----------
+        path: str
+            A path of the CSV to write. '-' writes on stdout.
 
-        # get all liked tracks from csv
-        tracks_from_csv = liked_track_service.get_all_tracks()
+        Raises
+        ------
+        Exception
+            If it fails to export.
 
-        # retreave new liked tracks
-        urls = set(track["url"] for track in tracks_from_csv)
-        names = set(track["name"] for track in tracks_from_csv)
+        Return
+        ------
+        tracks_len: int
+            The number of tracks exported.
+        """
+        new_track_service = NewTrackService()
+        return new_track_service.export_history(path)
 
-        common_liked_tracks = []
-        unique_liked_tracks = []
+    def retreave_liked_tracks(self, dry_run: bool = False, known: TrackIdentityIndex = None, full: bool = False) -> int:
+        """ Add liked tracks which are not on CSV yet
 
-        for t in tracks_from_spotify:
-            if t["url"] not in urls:
-                unique_liked_tracks.append(t)
-                continue
+        By default only the tracks saved after the watermark of the last sync
+        are fetched. Without a watermark, or with full, every saved track is fetched
+        and diffed against the CSV.
+        If the last sync wrote on CSV but stopped before moving the watermark,
+        e.g. when GSS failed, the tracks after the watermark are diffed against the CSV
+        so they are not written on it twice. The ones found on it are written on GSS only.
 
-            if t["name"] not in names:
-                unique_liked_tracks.append(t)
-                continue
+        Parameters
+        ----------
+        dry_run: bool
+            Find liked tracks without adding them anywhere.
+        known: TrackIdentityIndex
+            The liked tracks on CSV kept by the caller,
+            e.g. the daemon. The added tracks are put on it. If None, the CSV is read
+            for a full sync.
+        full: bool
+            Ignore the watermark and reconcile the whole library with the CSV.
 
-            common_liked_tracks.append(t)
+        Raises
+        ------
+        None
 
+        Return
+        ------
+        unique_liked_tracks_len: int
+            The number of liked tracks (to be) added.
+        """
+        connect.set_up()
+        liked_track_service = LikedTrackService()
+        watermark = liked_track_service.watermark()
+        since = None if full else watermark.read()
+        tracks_from_spotify = liked_track_service.retreave_liked_tracks(since=since)
+
+        # Tracks after the watermark are new, so the CSV is only read for a full sync
+        # or after a sync which stopped before moving the watermark
+        pending = watermark.pending()
+        if pending:
+            if known is None:
+                known = LikedTrackService.index_tracks(liked_track_service.iter_all_tracks())
+            else:
+                known.update(liked_track_service.iter_all_tracks())
+        elif known is None and since is None:
+            known = LikedTrackService.index_tracks(liked_track_service.iter_all_tracks())
+        if known is None:
+            known = LikedTrackService.index_tracks([])
+
+        # One diff decides what goes on both CSV and GSS
+        unique_liked_tracks, common_liked_tracks = known.partition(tracks_from_spotify)
+
+        # Tracks after the watermark already on CSV were written by the sync which stopped.
+        # GSS is written after CSV, so it is where that sync failed
+        resent_liked_tracks = common_liked_tracks if pending and since is not None else []
 
         # add liked tracks on CSV
         # add liked tracks on GSS
-        if unique_liked_tracks:
+        if resent_liked_tracks and not dry_run:
+            resent_liked_tracks.reverse()
+            print(f'there is liked tracks only on CSV: {len(resent_liked_tracks)}')
+            liked_track_service.write_to_gss(resent_liked_tracks)
+        if unique_liked_tracks and not dry_run:
             unique_liked_tracks.reverse()
             print(f'there is unique_liked_tracks: {len(unique_liked_tracks)}')
+            watermark.begin(liked_track_service.newest)
             liked_track_service.write_to_csv(unique_liked_tracks)
+            known.update(unique_liked_tracks)
+        elif unique_liked_tracks:
+            for t in unique_liked_tracks:
+                logger_con.info(f'[dry-run] Add liked: {t["name"]}')
+
+        # The next sync stops at the newest track of this one
+        if not dry_run and liked_track_service.newest:
+            watermark.write(liked_track_service.newest)
+        elif not dry_run:
+            watermark.done()
 
         # toggle liked track on GSS
         # get track urls you woll download
+        return len(unique_liked_tracks)
 
     def podcasts(self):
         connect.set_up()
@@ -6,8 +6,9 @@ import utils.helper as helper
 import utils.connect as connect
 from services.new_track_service import NewTrackService
 from services.liked_track_service import LikedTrackService
+from utils.logger import get_logger
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -0,0 +1,353 @@
+"""
+Long-running mode.
+
+    python daemon.py [--env dev]
+
+It connects once, keeps the track history and the liked tracks indexed in memory,
+runs add-new and sync-liked on the schedules of [DAEMON], and serves its status on
+GET http://HOST:PORT/status (127.0.0.1 by default). SIGINT and SIGTERM stop it.
+"""
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import utils.connect as connect
+import utils.http as http
+import utils.response_cache as response_cache
+import utils.setting as setting
+import utils.rate_limiter as rate_limiter
+from controllers.new_track_controller import NewTrackController
+from models.playlist import PlaylistModel
+from services.liked_track_service import LikedTrackService
+from services.new_track_service import NewTrackService
+from utils.clock import get_clock
+from utils.logger import SetUpLogging, get_logger
+from utils.track_index import TrackIndex
+
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class Job():
+    """
+        A class used to represent a job run on an interval.
+
+        Attributes
+        ----------
+        name: str
+            The name of the job.
+        interval_sec: float
+            The seconds between the runs.
+        func:
+            The function to run. It returns the number of tracks it added.
+        next_run_at: float
+            The time.monotonic() of the next run.
+        stats: dict
+            runs, failures and the status, count, elapsed_sec and error of the last run.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, name: str, interval_sec: float, func):
+        self.name = name
+        self.interval_sec = interval_sec
+        self.func = func
+        self.next_run_at = time.monotonic()
+        self.stats = {
+            'runs': 0,
+            'failures': 0,
+            'last_started_at': None,
+            'last_status': None,
+            'last_count': None,
+            'last_elapsed_sec': None,
+            'last_error': None
+        }
+
+
+class Daemon():
+    """
+        A class used to run the app as a long-running process.
+
+        Attributes
+        ----------
+        jobs: list
+            The scheduled jobs.
+        history_index: TrackIndex
+            The track history, kept up to date with the tracks the daemon adds.
+        liked_known: TrackIdentityIndex
+            The liked tracks on CSV.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, add_new_interval_min: float = None, sync_liked_interval_min: float = None,
+                 host: str = None, port: int = None):
+        """
+            Parameters
+            ----------
+            add_new_interval_min: float
+                Minutes between the runs of add-new. 0 disables it. [DAEMON] by default.
+            sync_liked_interval_min: float
+                Minutes between the runs of sync-liked. 0 disables it. [DAEMON] by default.
+            host: str
+                The host of the status endpoint. [DAEMON] by default.
+            port: int
+                The port of the status endpoint. [DAEMON] by default.
+        """
+        if add_new_interval_min is None:
+            add_new_interval_min = setting.DAEMON_ADD_NEW_INTERVAL_MIN
+        if sync_liked_interval_min is None:
+            sync_liked_interval_min = setting.DAEMON_SYNC_LIKED_INTERVAL_MIN
+        self.host = host or setting.DAEMON_HOST
+        self.port = port if port is not None else setting.DAEMON_PORT
+
+        self.controller = NewTrackController()
+        self.jobs = []
+        if add_new_interval_min > 0:
+            self.jobs.append(Job('add-new', add_new_interval_min * 60, self.add_new_tracks))
+        if sync_liked_interval_min > 0:
+            self.jobs.append(Job('sync-liked', sync_liked_interval_min * 60, self.sync_liked_tracks))
+
+        self.history_index = None
+        self.history_signature = None
+        self.liked_known = None
+        self.liked_signature = None
+        self.liked_runs = 0
+
+        self.started_at = None
+        self.stop_event = threading.Event()
+        # Jobs share the clients and the indexes, so they run one at a time
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self) -> None:
+        """
+            Connect, serve the status and run the jobs until stopped.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            None
+        """
+        SetUpLogging().setup_logging(setting.LOG_CONFIG_PATH)
+        self.started_at = time.time()
+        logger_pro.info({
+            'action': 'Start daemon',
+            'status': 'Run',
+            'message': '',
+            'data': {
+                'jobs': {j.name: j.interval_sec for j in self.jobs},
+                'host': self.host,
+                'port': self.port
+            }
+        })
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        # Warm up the clients once, they are reused by every run
+        connect.set_up()
+
+        self.server = ThreadingHTTPServer((self.host, self.port), StatusHandler)
+        self.server.daemon_threads = True
+        self.server.app = self
+        threading.Thread(target=self.server.serve_forever, name='status', daemon=True).start()
+        logger_con.info(f'Serving status on http://{self.host}:{self.port}/status')
+
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            for job in self.jobs:
+                if job.next_run_at <= now and not self.stop_event.is_set():
+                    self.run_job(job)
+                    job.next_run_at = time.monotonic() + job.interval_sec
+            if not self.jobs:
+                self.stop_event.wait()
+                break
+            self.stop_event.wait(max(0, min(j.next_run_at for j in self.jobs) - time.monotonic()))
+
+        self.server.shutdown()
+        logger_pro.info({
+            'action': 'Start daemon',
+            'status': 'Success',
+            'message': 'Stopped',
+            'data': self.status()
+        })
+        return None
+
+    def stop(self, *args) -> None:
+        self.stop_event.set()
+        return None
+
+    def run_job(self, job: Job) -> None:
+        """
+            Run a job and keep its stats.
+
+            A failure is logged and counted, and the daemon keeps running.
+
+            Parameters
+            ----------
+            job: Job
+                A job to run.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            None
+        """
+        with self.lock:
+            # A run is a new day for created_at and may see changed playlists
+            get_clock().start()
+            PlaylistModel.invalidate()
+            connect.set_up()
+
+            job.stats['last_started_at'] = time.time()
+            start = time.perf_counter()
+            try:
+                job.stats['last_count'] = job.func()
+                job.stats['last_status'] = 'Success'
+                job.stats['last_error'] = None
+            except Exception as e:
+                job.stats['failures'] += 1
+                job.stats['last_status'] = 'Fail'
+                job.stats['last_error'] = repr(e)
+                logger_pro.error({
+                    'action': f'Run a job ({job.name})',
+                    'status': 'Fail',
+                    'message': '',
+                    'exception': e
+                })
+            job.stats['runs'] += 1
+            job.stats['last_elapsed_sec'] = round(time.perf_counter() - start, 3)
+            logger_pro.info({
+                'action': f'Run a job ({job.name})',
+                'status': job.stats['last_status'],
+                'message': '',
+                'data': job.stats
+            })
+        return None
+
+    def add_new_tracks(self) -> int:
+        history_repo = NewTrackService.history_repository()
+        signature = self.signature(history_repo.path)
+        # Someone else (e.g. the CLI) wrote the history, so index it again
+        if self.history_index is None or signature != self.history_signature:
+            self.history_index = TrackIndex(history_repo.iter_all())
+        count = self.controller.add_new_tracks(history_index=self.history_index)
+        self.history_signature = self.signature(history_repo.path)
+        return count
+
+    def sync_liked_tracks(self) -> int:
+        path = LikedTrackService.liked_repository().path
+        signature = self.signature(path)
+        if self.liked_known is None or signature != self.liked_signature:
+            self.liked_known = LikedTrackService.index_tracks(LikedTrackService().iter_all_tracks())
+        # The first run and every n-th run reconcile the whole library
+        every = setting.DAEMON_SYNC_LIKED_FULL_EVERY
+        full = self.liked_runs == 0 or (every > 0 and self.liked_runs % every == 0)
+        self.liked_runs += 1
+        count = self.controller.retreave_liked_tracks(known=self.liked_known, full=full)
+        self.liked_signature = self.signature(path)
+        return count
+
+    @classmethod
+    def signature(cls, path: str) -> tuple:
+        # Size and mtime of a file and of its SQLite WAL, if any
+        signature = []
+        for p in (path, path + '-wal'):
+            try:
+                stat = os.stat(p)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def status(self) -> dict:
+        """
+            Get the status of the daemon.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            status: dict
+                The uptime, the stats of the jobs, the size of the indexes, the API counters
+                the response sizes per endpoint and the response cache counters.
+        """
+        now = time.monotonic()
+        return {
+            'uptime_sec': round(time.time() - self.started_at, 1) if self.started_at else None,
+            'jobs': {
+                j.name: dict(j.stats,
+                             interval_sec=j.interval_sec,
+                             next_run_in_sec=round(max(0, j.next_run_at - now), 1))
+                for j in self.jobs
+            },
+            'indexes': {
+                'history_len': len(self.history_index) if self.history_index is not None else None,
+                'liked_len': len(self.liked_known) if self.liked_known is not None else None
+            },
+            'api': rate_limiter.stats(),
+            'http': http.stats(),
+            'cache': response_cache.stats()
+        }
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """
+        A class used to serve the status of the daemon as JSON.
+
+            GET /status
+            GET /health
+    """
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self.send_json({'status': 'ok'})
+        elif self.path == '/status':
+            self.send_json(self.server.app.status())
+        else:
+            self.send_json({'error': 'not found'}, status=404)
+        return None
+
+    def send_json(self, data: dict, status: int = 200) -> None:
+        body = json.dumps(data, ensure_ascii=False, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return None
+
+    def log_message(self, format, *args) -> None:
+        logger_pro.debug(lambda: {
+            'action': 'Serve the status of daemon',
+            'status': 'Success',
+            'message': format % args
+        })
+        return None
+
+
+if __name__ == '__main__':
+    Daemon().start()
@@ -1,9 +1,15 @@
 """Entory point"""
+import sys
 
+from cli import Cli
 from console import Console
 
 
 def main():
+    # A subcommand runs without the menu, see cli.py
+    if Cli.is_command(sys.argv[1:]):
+        sys.exit(Cli().run())
+
     console = Console()
     console.start()
     
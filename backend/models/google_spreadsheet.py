@@ -1,12 +1,13 @@
 import logging
-
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import threading
 
 from models.singleton import Singleton
 import utils.setting as setting
+from utils.http import mount_pool
+from utils.rate_limiter import RateLimitedProxy, get_limiter
+from utils.logger import get_logger
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 class GoogleSpreadsheet(Singleton):
@@ -14,19 +15,23 @@ class GoogleSpreadsheet(Singleton):
         Reference:
         - https://qiita.com/164kondo/items/eec4d1d8fd7648217935
         - https://www.cdatablog.jp/entry/2019/04/16/191006
+
+        It connects once per process, and the authorized session
+        keeps its connections alive for every later action.
     """
-    connect = None
+    conn = None
+    _lock = threading.Lock()
 
     def __init__(self):
         pass
 
-    def connect(self) -> None:
+    def connect(self, force: bool = False) -> None:
         """ Connect Google Spreadsheet.
 
         Parameters
         ----------
-        model:
-            A model to connect
+        force: bool
+            Connect again even if it is already connected.
 
         Raises
         ------
@@ -38,6 +43,13 @@ class GoogleSpreadsheet(Singleton):
         worksheet:
             the worksheet to be written
         """
+        with self._lock:
+            if self.conn is not None and not force:
+                return None
+            self._connect()
+        return None
+
+    def _connect(self) -> None:
         json_path = setting.AUTHENTICATION_JSON
         scope = ['https://spreadsheets.google.com/feeds',
                  'https://www.googleapis.com/auth/drive']
@@ -50,9 +62,22 @@ class GoogleSpreadsheet(Singleton):
             'message': ''
         })
         try:
+            # gspread and oauth2client are imported only when Sheets are used
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+
             credentials = ServiceAccountCredentials.from_json_keyfile_name(json_path, scope)
             gc = gspread.authorize(credentials)
-            self.conn = gc
+            # The authorized session is gc.http_client.session on gspread 6, gc.session before
+            session = getattr(getattr(gc, 'http_client', gc), 'session', None)
+            if session is not None:
+                mount_pool(session, setting.HTTP_POOL_SIZE)
+            limiter = get_limiter('gss',
+                                  setting.GSS_RATE,
+                                  setting.GSS_BURST,
+                                  max_retries=setting.MAX_RETRIES)
+            # Spreadsheets and worksheets make requests too, so they are wrapped as well
+            self.conn = RateLimitedProxy(gc, limiter, wrap_types=(gspread.Spreadsheet, gspread.Worksheet))
             logger_con.info('Succeed in connecting Google Spreadshee...')
             logger_pro.info({
                 'action': 'Connect Google Spreadsheet',
@@ -2,6 +2,8 @@ import abc
 
 
 class NewTrack(metaclass=abc.ABCMeta):
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -1,37 +1,133 @@
 import logging
 
-import utils.setting as setting
 from models.interfaces.new_track import NewTrack
+from utils.clock import get_clock
+import utils.projection as projection
+from utils.logger import get_logger
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 class NewTrackModel(NewTrack):
-    def __init__(self):
-        self.name = None
-        self.artist = None
-        self.playlist_name = None
-        self.track_url = None
-        self.playlist_url = None
-        self.release_date = None
-        self.added_at = None
-        self.created_at = None
-        self.like = None
-    
+    """
+        A class used to represent a new track.
+
+        The attributes live in __slots__, so an instance has no __dict__.
+        from_row, from_dict and from_spotify_json build an instance
+        without logging, since they run once per row on every load.
+
+        Attributes
+        ----------
+        name: str
+        artist: str
+        playlist_name: str
+        track_url: str
+        playlist_url: str
+        release_date: str
+        added_at: str
+        created_at: str
+        like: bool
+
+        Methods
+        ------
+    """
+    COLUMNS = (
+        'name',
+        'artist',
+        'playlist_name',
+        'track_url',
+        'playlist_url',
+        'release_date',
+        'added_at',
+        'created_at',
+        'like'
+        )
+    __slots__ = COLUMNS
+
+    def __init__(self, name=None, artist=None, playlist_name=None, track_url=None,
+                 playlist_url=None, release_date=None, added_at=None, created_at=None, like=None):
+        self.name = name
+        self.artist = artist
+        self.playlist_name = playlist_name
+        self.track_url = track_url
+        self.playlist_url = playlist_url
+        self.release_date = release_date
+        self.added_at = added_at
+        self.created_at = created_at
+        self.like = like
+
+    @classmethod
+    def from_row(cls, row) -> 'NewTrackModel':
+        """ 
+            Create a track from a row in the order of COLUMNS, e.g. a CSV or SQLite row.
+
+            Values after the last column are ignored, and missing values are None.
+
+            Parameters
+            ----------
+            row: sequence
+                The values of the row.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            track: NewTrackModel
+                A new track instance.
+        """
+        return cls(*row[:len(cls.COLUMNS)])
+
+    @classmethod
+    def from_dict(cls, track_dict: dict) -> 'NewTrackModel':
+        # Keys which are not columns are ignored
+        return cls(**{k: v for k, v in track_dict.items() if k in cls.COLUMNS})
+
+    @classmethod
+    def from_spotify_json(cls, track_json: dict, created_at: str = None,
+                          playlist_name: str = None, playlist_url: str = None) -> 'NewTrackModel':
+        """ 
+            Create a track from a track json data of Spotify API.
+
+            Parameters
+            ----------
+            track_json: dict
+                A track json data.
+            created_at: str
+                The date the track is created at. The date of the run by default.
+            playlist_name: str
+                A playlist name.
+            playlist_url: str
+                A playlist url.
+
+            Raises
+            ------
+            KeyError
+                If the json does not have a value we need.
+
+            Return
+            ------
+            track: NewTrackModel
+                A new track instance.
+        """
+        return cls(track_json['name'],
+                   track_json['artists'][0]['name'],
+                   playlist_name,
+                   projection.original(track_json)['external_urls']['spotify'],
+                   playlist_url,
+                   track_json['album']['release_date'],
+                   None,
+                   created_at or get_clock().date,
+                   False)
+
     def get_columns(self) -> list:
-        columns = [
-            'name',
-            'artist',
-            'playlist_name',
-            'track_url',
-            'playlist_url',
-            'release_date',
-            'added_at',
-            'created_at',
-            'like'
-            ]
-        return columns
-    
+        return list(self.COLUMNS)
+
+    def to_row(self) -> tuple:
+        return (self.name, self.artist, self.playlist_name, self.track_url, self.playlist_url,
+                self.release_date, self.added_at, self.created_at, self.like)
+
     def get_dict(self) -> dict:
         """ 
             Get track dict data.
@@ -50,38 +146,7 @@ class NewTrackModel(NewTrack):
             track: dict
                 A track dict data.
         """
-        logger_pro.debug({
-            'action': 'Get track dict data.',
-            'status': 'Run',
-            'message': ''
-        })
-        try:
-            track = {
-                'name': self.name,
-                'artist': self.artist,
-                'playlist_name': self.playlist_name,
-                'track_url': self.track_url,
-                'playlist_url': self.playlist_url,
-                'release_date': self.release_date,
-                'added_at': self.added_at,
-                'created_at': self.created_at,
-                'like': self.like
-            }
-            logger_pro.debug({
-                'action': 'Get track dict data.',
-                'status': 'Success',
-                'message': '',
-                'track': track
-            })
-        except Exception as e:
-            logger_pro.error({
-                'action': 'Get track dict data.',
-                'status': 'Success',
-                'message': '',
-                'exception': e
-            })
-            raise Exception
-        return track
+        return dict(zip(self.COLUMNS, self.to_row()))
 
     def set_columns(self, tracks_dict: dict) -> None:
         """ 
@@ -101,13 +166,7 @@ class NewTrackModel(NewTrack):
             ------
             None.
         """
-        logger_pro.debug({
-            'action': 'Set dict data up columns.',
-            'status': 'Run',
-            'message': ''
-        })
         try:
-
             self.name = tracks_dict['name']
             self.artist = tracks_dict['artist']
             self.playlist_name = tracks_dict['playlist_name']
@@ -117,18 +176,12 @@ class NewTrackModel(NewTrack):
             self.added_at = tracks_dict['added_at']
             self.created_at = tracks_dict['created_at']
             self.like = tracks_dict['like']
-
-            logger_pro.debug({
-                'action': 'Set dict data up columns.',
-                'status': 'Success',
-                'message': ''
-            })
         except Exception as e:
             logger_pro.error({
                 'action': 'Set dict data up columns.',
                 'status': 'Fail',
-                'message': ''
+                'message': '',
+                'exception': e
             })
             raise Exception
         return None
-
@@ -0,0 +1,135 @@
+import logging
+import threading
+
+from models.spotify import SpotifyModel
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class PlaylistModel():
+    """
+        A class used to represent playlist metadata.
+
+        The metadata is fetched with one request projected by `fields`
+        and kept in a per-run cache, so the total, name, url and snapshot_id
+        of a playlist cost a single API call.
+
+        Attributes
+        ----------
+        playlist_id: str
+            A playlist ID.
+        name: str
+            A playlist name.
+        url: str
+            A playlist url.
+        total: int
+            The number of tracks in the playlist.
+        snapshot_id: str
+            The version of the playlist.
+
+        Methods
+        ------
+    """
+    FIELDS = 'name,external_urls.spotify,snapshot_id,tracks.total'
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, playlist_id: str = None, name: str = None, url: str = None,
+                 total: int = None, snapshot_id: str = None):
+        self.playlist_id = playlist_id
+        self.name = name
+        self.url = url
+        self.total = total
+        self.snapshot_id = snapshot_id
+
+    @classmethod
+    def fetch(cls, playlist_id: str, conn=None) -> 'PlaylistModel':
+        """
+            Fetch playlist metadata, from the cache if it was fetched in this run.
+
+            Parameters
+            ----------
+            playlist_id: str
+                A playlist ID.
+            conn:
+                An object to call Spotify API. SpotifyModel().conn by default.
+
+            Raises
+            ------
+            Exception
+                If you can not fetch playlist metadata through Spotify API.
+
+            Return
+            ------
+            playlist: PlaylistModel
+                The playlist metadata.
+        """
+        playlist = cls._cache.get(playlist_id)
+        if playlist is not None:
+            return playlist
+
+        logger_pro.debug(lambda: {
+            'action': f'Fetch playlist metadata ({playlist_id}).',
+            'status': 'Run',
+            'message': ''
+        })
+        try:
+            if conn is None:
+                conn = SpotifyModel().conn
+            playlist_data = conn.playlist(playlist_id, fields=cls.FIELDS)
+            playlist = cls(playlist_id=playlist_id,
+                           name=playlist_data['name'],
+                           url=playlist_data['external_urls']['spotify'],
+                           total=playlist_data['tracks']['total'],
+                           snapshot_id=playlist_data['snapshot_id'])
+            logger_pro.debug(lambda: {
+                'action': f'Fetch playlist metadata ({playlist_id}).',
+                'status': 'Success',
+                'message': '',
+                'data': vars(playlist)
+            })
+        except Exception as e:
+            logger_pro.error({
+                'action': f'Fetch playlist metadata ({playlist_id}).',
+                'status': 'Fail',
+                'message': '',
+                'exception': e,
+                'data': {
+                    'playlist_id': playlist_id
+                }
+            })
+            raise Exception
+
+        with cls._lock:
+            return cls._cache.setdefault(playlist_id, playlist)
+
+    @classmethod
+    def invalidate(cls, playlist_id: str = None) -> None:
+        """
+            Drop cached playlist metadata.
+
+            Call this after modifying a playlist, since its total
+            and snapshot_id change.
+
+            Parameters
+            ----------
+            playlist_id: str
+                A playlist ID to drop. If None, drop every playlist.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            None
+        """
+        with cls._lock:
+            if playlist_id is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(playlist_id, None)
+        return None
@@ -1,28 +1,57 @@
 import logging
-
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
+import threading
+import time
 
 from models.singleton import Singleton
 import utils.setting as setting
+from utils.http import new_session, track_responses
+from utils.rate_limiter import RateLimitedProxy, get_limiter
+from utils.response_cache import cache_responses, get_cache
+from utils.logger import get_logger
 
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
 class SpotifyModel(Singleton):
+    """
+        A class used to represent the connection to Spotify API.
+
+        It connects once per process: the client, its pooled session
+        and the token are reused by every later action.
+        The token is cached in a file, so a new process does not need
+        to authorize again, and it is refreshed a little before it expires.
+
+        Attributes
+        ----------
+        conn: RateLimitedProxy
+            A spotipy client behind the rate limiter.
+        auth_manager: SpotifyOAuth
+            The auth manager which owns the token cache.
+        session: requests.Session
+            The keep-alive session shared by the client and the auth manager.
+
+        Methods
+        ------
+    """
     conn = None
+    auth_manager = None
+    session = None
+    _lock = threading.Lock()
 
     def __init__(self):
         pass
 
-    def connect(self) -> None:
+    def connect(self, force: bool = False) -> None:
         """ Connect spotify api by SpotifyOAuth.
 
+        If it is already connected, only the token is refreshed when it is about to expire.
+
         Parameters
         ----------
-        None
+        force: bool
+            Connect again even if it is already connected.
 
         Raises
         ------
@@ -34,6 +63,14 @@ class SpotifyModel(Singleton):
         spotify:
             a object to connect spotify.
         """
+        with self._lock:
+            if self.conn is not None and not force:
+                self.refresh_token()
+                return None
+            self._connect()
+        return None
+
+    def _connect(self) -> None:
         # get api data from environment environment variables
         client_id = setting.CONFIG['SPOTIPY']['SPOTIPY_CLIENT_ID']
         client_secret = setting.CONFIG['SPOTIPY']['SPOTIPY_CLIENT_SECRET']
@@ -64,15 +101,41 @@ class SpotifyModel(Singleton):
                 'scope': scope
             }
         })
+        # spotipy is imported only when Spotify is used
+        import spotipy
+        from spotipy.cache_handler import CacheFileHandler
+        from spotipy.oauth2 import SpotifyOAuth
+
+        # One keep-alive pool for the API and the token endpoint,
+        # large enough for the threads fetching pages at once
+        session = track_responses(new_session(setting.HTTP_POOL_SIZE), setting.HTTP_BASELINE_PATH)
+        # Unchanged GETs are revalidated with If-None-Match and answered from disk
+        cache = get_cache()
+        if cache is not None:
+            cache_responses(session, cache)
         auth_manager = SpotifyOAuth(client_id=client_id,
                                     client_secret=client_secret,
                                     redirect_uri=redirect_uri,
                                     scope=scope,
-                                    open_browser=False)
+                                    open_browser=False,
+                                    cache_handler=CacheFileHandler(cache_path=setting.SPOTIFY_TOKEN_CACHE),
+                                    requests_session=session)
 
         try:
             # Connect spotify
-            self.conn = spotipy.Spotify(auth_manager=auth_manager, language='en')
+            # spotipy does not mount its retry adapter on a given session, and
+            # the pooled adapter of mount_pool has max_retries=0, so every retry,
+            # including 429 with Retry-After, is left to the limiter
+            client = spotipy.Spotify(auth_manager=auth_manager,
+                                     requests_session=session,
+                                     language='en')
+            limiter = get_limiter('spotify',
+                                  setting.SPOTIFY_RATE,
+                                  setting.SPOTIFY_BURST,
+                                  max_retries=setting.MAX_RETRIES)
+            self.conn = RateLimitedProxy(client, limiter)
+            self.auth_manager = auth_manager
+            self.session = session
             logger_con.info('Succeed in connecting Spotify...')
             logger_pro.info({
                 'action': 'Connect spotify api by SpotifyOAuth',
@@ -87,3 +150,45 @@ class SpotifyModel(Singleton):
                 'message': e
             })
         return
+
+    def refresh_token(self) -> None:
+        """ Refresh the cached token if it expires within the margin.
+
+        spotipy refreshes a token only 60 seconds before it expires, while a request
+        is waiting. Refreshing earlier keeps that round trip out of the actions.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+            A failure is logged, since spotipy still refreshes the token on the next request.
+
+        Return
+        ------
+        None
+        """
+        if self.auth_manager is None:
+            return None
+        try:
+            token_info = self.auth_manager.cache_handler.get_cached_token()
+            if not token_info:
+                return None
+            if token_info['expires_at'] - time.time() > setting.SPOTIFY_TOKEN_REFRESH_MARGIN:
+                return None
+            self.auth_manager.refresh_access_token(token_info['refresh_token'])
+            logger_pro.info({
+                'action': 'Refresh the token of Spotify',
+                'status': 'Success',
+                'message': ''
+            })
+        except Exception as e:
+            logger_pro.warning({
+                'action': 'Refresh the token of Spotify',
+                'status': 'Fail',
+                'message': '',
+                'exception': e
+            })
+        return None
@@ -0,0 +1,103 @@
+from itertools import zip_longest
+
+from models.new_track import NewTrackModel
+
+
+class TrackBatch():
+    """
+        A class used to represent many tracks column by column.
+
+        Each column is a list, so bulk operations (writing rows, indexing urls)
+        run without creating a NewTrackModel per track.
+        Iterating a batch yields NewTrackModel instances when you need them.
+
+        Attributes
+        ----------
+        columns: dict
+            A dict of column name to the list of its values,
+            in the order of NewTrackModel.COLUMNS.
+
+        Methods
+        ------
+    """
+    COLUMNS = NewTrackModel.COLUMNS
+
+    def __init__(self):
+        self.columns = {c: [] for c in self.COLUMNS}
+
+    @classmethod
+    def from_rows(cls, rows) -> 'TrackBatch':
+        """ 
+            Create a batch from rows in the order of COLUMNS, e.g. CSV or SQLite rows.
+
+            Parameters
+            ----------
+            rows: iterable
+                Rows of track values. It can be a generator.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            batch: TrackBatch
+                A batch of the rows.
+        """
+        batch = cls()
+        batch.extend_rows(rows)
+        return batch
+
+    @classmethod
+    def from_tracks(cls, tracks) -> 'TrackBatch':
+        return cls.from_rows(t.to_row() for t in tracks)
+
+    @classmethod
+    def rows_of(cls, tracks):
+        """ 
+            Get the rows of a batch or of a list of tracks.
+
+            Parameters
+            ----------
+            tracks: TrackBatch or iterable
+                A batch or new track instances.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            rows: iterator
+                Tuples in the order of COLUMNS.
+        """
+        if isinstance(tracks, cls):
+            return tracks.rows()
+        return (t.to_row() for t in tracks)
+
+    def __len__(self) -> int:
+        return len(self.columns['track_url'])
+
+    def __iter__(self):
+        return (NewTrackModel.from_row(row) for row in self.rows())
+
+    def __getitem__(self, i: int) -> NewTrackModel:
+        return NewTrackModel.from_row(self.columns[c][i] for c in self.COLUMNS)
+
+    def column(self, name: str) -> list:
+        return self.columns[name]
+
+    def rows(self):
+        return zip(*(self.columns[c] for c in self.COLUMNS))
+
+    def append(self, track: NewTrackModel) -> None:
+        self.extend_rows([track.to_row()])
+        return None
+
+    def extend_rows(self, rows) -> None:
+        appends = [self.columns[c].append for c in self.COLUMNS]
+        for row in rows:
+            # A short row is padded with None
+            for append, value in zip_longest(appends, row):
+                append(value)
+        return None
@@ -1,16 +1,13 @@
 import csv
-from configparser import ConfigParser
 import logging
 
 from models.new_track import NewTrackModel
 import utils.helper as helper
 import utils.setting as setting
+from utils.logger import get_logger
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
-CONFIG_FILE = './config/config.ini'
-CONFIG = ConfigParser()
-CONFIG.read(CONFIG_FILE)
 
 
 class CsvLikedTrackRepository():
@@ -26,48 +23,63 @@ class CsvLikedTrackRepository():
         if setting.ENV == 'dev':
             self.path = setting.FILE_PATH_OF_CSV_TEST
         else:
-            self.path = CONFIG["CSV"]["DIR"] + CONFIG["CSV"]["LIKED_TRACKS"]
+            self.path = setting.CONFIG["CSV"]["DIR"] + setting.CONFIG["CSV"]["LIKED_TRACKS"]
 
     def get_all(self) -> list:
-        tracks = []
+        tracks = list(self.iter_all())
+        if tracks:
+            logger_pro.info({
+                'action': 'Read all tracks from csv',
+                'status': 'Success',
+                'message': '',
+                'data': {
+                    'tracks_len': len(tracks)
+                }
+            })
+        else:
+            logger_pro.warning({
+                'action': 'Read all tracks from csv',
+                'status': 'Warning',
+                'message': 'There is no track on CSV'
+            })
 
-        # If there is no csv file, return empty list
+        return tracks
+
+    def iter_all(self):
+        """
+            Yield all liked tracks lazily, one row at a time.
+
+            The file is closed as soon as the caller stops iterating.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to read tracks. It is logged and the iteration stops.
+
+            Return
+            ------
+            tracks: generator
+                A generator of liked track dicts.
+        """
+        # If there is no csv file, yield nothing
         if not helper.exists_file(self.path):
-            return tracks
+            return
 
-        # If there is no header on csv file, return empty list
+        # If there is no header on csv file, yield nothing
         header = CsvLikedTrackRepository.read_header(self.path)
         if not header:
-            return tracks
+            return
 
         try:
             with open(self.path, 'r', newline='') as csvfile:
                 csv_reader = csv.reader(csvfile)
                 next(csv_reader)
                 for row in csv_reader:
-                    track = {}
-
-                    # Set track dict
-                    for r, h in zip(row, header):
-                        track[h] = r
-
-                    tracks.append(track)
-            if tracks:
-                logger_pro.info({
-                    'action': 'Read all tracks from csv',
-                    'status': 'Success',
-                    'message': '',
-                    'data': {
-                        'tracks_len': len(tracks)
-                    }
-                })
-            else:
-                logger_pro.warning({
-                    'action': 'Read all tracks from csv',
-                    'status': 'Warning',
-                    'message': 'There is no track on CSV'
-                })
-
+                    yield dict(zip(header, row))
         except Exception as e:
             logger_pro.error({
                 'action': 'Read all tracks from csv',
@@ -79,7 +91,25 @@ class CsvLikedTrackRepository():
                 }
             })
 
-        return tracks
+    def iter_where(self, predicate):
+        """
+            Yield the liked tracks which match a condition lazily.
+
+            Parameters
+            ----------
+            predicate:
+                A callable which takes a liked track dict and returns bool.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            tracks: generator
+                A generator of liked track dicts.
+        """
+        return (t for t in self.iter_all() if predicate(t))
 
     def add_tracks(self, tracks: list) -> None:
         # If there is no csv file, return empty list
@@ -145,7 +175,7 @@ class CsvLikedTrackRepository():
                 The header on the path of CSV.
         """
 
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Read header data from csv',
             'status': 'Run',
             'message': ''
@@ -157,7 +187,7 @@ class CsvLikedTrackRepository():
                 csv_dict_reader = csv.DictReader(csvfile)
                 header = csv_dict_reader.fieldnames
 
-            logger_pro.debug({
+            logger_pro.debug(lambda: {
                 'action': 'Read header data from csv',
                 'status': 'Success',
                 'message': '',
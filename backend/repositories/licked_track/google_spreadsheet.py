@@ -1,12 +1,12 @@
 import logging
-import time
 
 from models.new_track import NewTrackModel
 from models.google_spreadsheet import GoogleSpreadsheet
 from repositories.new_track.interfaces.new_track_repository import NewTrackRepoInterface
 import utils.setting as setting
+from utils.logger import get_logger
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -22,9 +22,6 @@ class GssLikedTrackRepository():
         Columns set up on model
     worksheet:
         An instance to connect Google Spreadsheet
-    sleep_time_sec: float
-        The sleep time by second for the interval
-        to write on a Google Spreadsheet.
 
     Methods
     ------
@@ -49,7 +46,8 @@ class GssLikedTrackRepository():
         self.gss = GoogleSpreadsheet()
         self.workbook = self.gss.conn.open_by_key(key)
         self.worksheet = self.workbook.worksheet(sheet_name)
-        self.sleep_time_sec = 0.9
+        self.next_row = None
+        self.checked_header = False
 
     def all(self):
         return
@@ -63,8 +61,8 @@ class GssLikedTrackRepository():
 
             Parameters
             ----------
-            track: NewTrackModel
-                A new track instance to add on GSS
+            track: dict
+                A liked track dict to add on GSS
 
             Raises
             ------
@@ -75,50 +73,88 @@ class GssLikedTrackRepository():
             ------
             None
         """
-        # If the spreadsheet is empty, Add column on header(from (1,1))
-        if not self.has_header():
-            self.add_header()
+        self.add_tracks([track])
+        return None
+
+    def add_tracks(self, tracks: list) -> None:
+        """
+            Add tracks on GSS with a single range update.
+
+            The header is checked once per repository instance,
+            and the next available row is looked up once and tracked locally.
+            An artist list is written as "a, b".
+
+            Parameters
+            ----------
+            tracks: list
+                A list of liked track dicts to add on GSS
 
+            Raises
+            ------
+            Exception
+                If it fails to add tracks.
 
-        logger_pro.debug({
-            'action': 'Add a track on GSS',
+            Return
+            ------
+            None
+        """
+        if not tracks:
+            return None
+
+        # If the spreadsheet is empty, Add column on header(from (1,1))
+        if not self.checked_header:
+            if not self.has_header():
+                self.add_header()
+            self.checked_header = True
+
+        logger_pro.debug(lambda: {
+            'action': 'Add tracks on GSS',
             'status': 'Run',
             'message': '',
             'args': {
-                'track': track
+                'tracks_len': len(tracks)
             }
         })
 
-        row_num = self.find_next_available_row()
-        track["download"] = None
-
-        for col_num, column in enumerate(self.header, start=1):
-            try:
-                v = track[column]
+        values = []
+        for track in tracks:
+            row = []
+            for column in self.header:
+                v = track.get(column)
                 if type(v) == list:
                     v = ", ".join(v)
+                row.append(v)
+            values.append(row)
 
-                self.worksheet.update_cell(row_num, col_num, v)
-                logger_con.debug(f'{column}: {v}')
-                time.sleep(self.sleep_time_sec)
-            except Exception as e:
-                logger_pro.error({
-                    'action': 'Add a track',
-                    'status': 'Fail',
-                    'message': e,
-                    'data': {
-                        'row_num': row_num,
-                        'col_num': col_num,
-                        'column': column,
-                        'track': track
-                    }
-                })
-                raise Exception
-
-        logger_pro.debug({
-            'action': 'Add a track on GSS',
+        try:
+            from gspread.utils import rowcol_to_a1
+            if self.next_row is None:
+                self.next_row = self.find_next_available_row()
+            last_row = self.next_row + len(values) - 1
+            if last_row > self.worksheet.row_count:
+                self.worksheet.add_rows(last_row - self.worksheet.row_count)
+            range_name = f'{rowcol_to_a1(self.next_row, 1)}:{rowcol_to_a1(last_row, len(self.header))}'
+            self.worksheet.update(range_name=range_name, values=values, value_input_option='RAW')
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Add tracks on GSS',
+                'status': 'Fail',
+                'message': e,
+                'data': {
+                    'next_row': self.next_row,
+                    'tracks_len': len(tracks)
+                }
+            })
+            raise Exception
+
+        self.next_row += len(values)
+        logger_pro.debug(lambda: {
+            'action': 'Add tracks on GSS',
             'status': 'Success',
-            'message': ''
+            'message': '',
+            'data': {
+                'next_row': self.next_row
+            }
         })
         return None
 
@@ -173,8 +209,9 @@ class GssLikedTrackRepository():
             'message': '',
         })
         try:
-            for i, column in enumerate(self.header, start=1):
-                self.worksheet.update_cell(1, i, column)
+            from gspread.utils import rowcol_to_a1
+            range_name = f'A1:{rowcol_to_a1(1, len(self.header))}'
+            self.worksheet.update(range_name=range_name, values=[self.header], value_input_option='RAW')
             logger_pro.info({
                 'action': 'Add header',
                 'status': 'Success',
@@ -0,0 +1,124 @@
+import logging
+
+from repositories.track.sqlite import SqliteTrackRepository
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class SqliteLikedTrackRepository():
+    """
+    A class used to represent the liked tracks on the SQLite track store.
+
+    They live in the liked_tracks table of the database of SqliteTrackRepository,
+    and it has the same methods as CsvLikedTrackRepository,
+    so LikedTrackService uses either by [APP] TRACK_STORE.
+
+    Attributes
+    ----------
+    header: list
+        Columns of a liked track dict.
+    store: SqliteTrackRepository
+        The track store which owns the database.
+    path: str
+        A path of the SQLite database.
+    conn: sqlite3.Connection
+        A connection to the database
+
+    Methods
+    ------
+    """
+    SELECT_ALL = ('SELECT name, artist, url, release_date, added_at, created_at '
+                  'FROM liked_tracks ORDER BY id')
+
+    def __init__(self, path: str = None):
+        """
+        Parameters
+        ----------
+        path: str
+            A path of the SQLite database. It is set up by the config by default.
+        """
+        self.header = SqliteTrackRepository.LIKED_COLUMNS
+        self.store = SqliteTrackRepository(path)
+        self.path = self.store.path
+        self.conn = self.store.conn
+
+    def get_all(self) -> list:
+        tracks = list(self.iter_all())
+        logger_pro.info({
+            'action': 'Read all liked tracks from SQLite',
+            'status': 'Success',
+            'message': '',
+            'data': {
+                'tracks_len': len(tracks)
+            }
+        })
+        return tracks
+
+    def iter_all(self):
+        """
+            Yield all liked tracks lazily from a cursor.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to read tracks.
+
+            Return
+            ------
+            tracks: generator
+                A generator of liked track dicts in the order they were added.
+        """
+        for row in self.conn.execute(self.SELECT_ALL):
+            yield dict(zip(self.header, row))
+
+    def iter_where(self, predicate):
+        return (t for t in self.iter_all() if predicate(t))
+
+    def add_tracks(self, tracks: list) -> None:
+        """
+            Insert liked tracks in a single transaction.
+
+            A track whose url and name are already stored is skipped.
+
+            Parameters
+            ----------
+            tracks: list
+                Liked track dicts.
+
+            Raises
+            ------
+            Exception
+                If it fails to insert tracks.
+
+            Return
+            ------
+            None
+        """
+        if not tracks:
+            return None
+        try:
+            with self.conn:
+                self.conn.executemany(self.store.INSERT_LIKED, (self.to_row(t) for t in tracks))
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Insert liked tracks on SQLite',
+                'status': 'Fail',
+                'message': '',
+                'exception': e,
+                'data': {
+                    'path': self.path
+                }
+            })
+            raise Exception
+        return None
+
+    def to_row(self, track: dict) -> tuple:
+        # Store values the way the CSV does, e.g. an artist list as its str()
+        return tuple(v if v is None or isinstance(v, str) else str(v)
+                     for v in (track.get(c) for c in self.header))
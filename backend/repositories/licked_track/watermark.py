@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class LikedTrackWatermark():
+    """
+    A class used to represent the newest liked track already synced.
+
+    Saved tracks come newest first, so a sync can stop paging
+    when it reaches the watermark. It is a small JSON file next to the CSV:
+    {"added_at": "2024-01-31T12:34:56Z", "track_id": "..."}
+
+    The tracks after the watermark are written on CSV before the watermark moves.
+    A pending file marks that window, so a sync which stopped in it is known
+    to have tracks on CSV after the watermark, and the next sync diffs against the CSV.
+
+    Attributes
+    ----------
+    path: str
+        A path of the watermark.
+    pending_path: str
+        A path of the pending file.
+
+    Methods
+    ------
+    """
+
+    def __init__(self, csv_path: str):
+        """
+        Parameters
+        ----------
+        csv_path: str
+            A path of the liked tracks CSV, or of the SQLite database with [APP] TRACK_STORE = sqlite.
+        """
+        self.path = csv_path + '.watermark.json'
+        self.pending_path = csv_path + '.watermark.pending.json'
+
+    def read(self) -> dict:
+        """
+            Read the watermark.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            watermark: dict
+                {'added_at': str, 'track_id': str}, or None if there is no valid watermark.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                watermark = json.load(f)
+            if watermark.get('added_at'):
+                return watermark
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger_pro.warning({
+                'action': 'Read the watermark of liked tracks',
+                'status': 'Warning',
+                'message': 'The watermark is broken, so liked tracks are synced in full',
+                'exception': e,
+                'data': {
+                    'path': self.path
+                }
+            })
+        return None
+
+    def begin(self, watermark: dict) -> None:
+        """
+            Mark that tracks after the watermark are about to be written on CSV.
+
+            Parameters
+            ----------
+            watermark: dict
+                The watermark the sync will write, or None if it will not move it.
+
+            Raises
+            ------
+            Exception
+                If it fails to write.
+
+            Return
+            ------
+            None
+        """
+        tmp_path = self.pending_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(watermark, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pending_path)
+        return None
+
+    def pending(self) -> bool:
+        """
+            Check whether a sync stopped between writing on CSV and moving the watermark.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            pending: bool
+                True if the CSV may have tracks after the watermark.
+        """
+        return os.path.exists(self.pending_path)
+
+    def write(self, watermark: dict) -> None:
+        """
+            Write the watermark atomically and clear the pending file.
+
+            Parameters
+            ----------
+            watermark: dict
+                {'added_at': str, 'track_id': str}
+
+            Raises
+            ------
+            Exception
+                If it fails to write.
+
+            Return
+            ------
+            None
+        """
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(watermark, f)
+        os.replace(tmp_path, self.path)
+        self.done()
+        logger_pro.info({
+            'action': 'Write the watermark of liked tracks',
+            'status': 'Success',
+            'message': '',
+            'data': watermark
+        })
+        return None
+
+    def done(self) -> None:
+        """
+            Clear the pending file.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            None
+        """
+        try:
+            os.remove(self.pending_path)
+        except FileNotFoundError:
+            pass
+        return None
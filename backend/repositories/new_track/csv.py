@@ -1,12 +1,17 @@
 import csv
 import logging
+import os
 
 from models.new_track import NewTrackModel
+from models.track_batch import TrackBatch
 from repositories.new_track.interfaces.new_track_repository import NewTrackRepoInterface
+from repositories.new_track.csv_index import CsvUrlIndex
 import utils.helper as helper
 import utils.setting as setting
+from utils.logger import get_logger
+from utils.track_index import track_id_from_url
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 class CsvNewTrackRepository(NewTrackRepoInterface):
@@ -24,6 +29,7 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
     Methods
     ------
     """
+    BUFFER_SIZE = 1 << 16
 
     def __init__(self):
         """
@@ -38,6 +44,7 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
             self.path = setting.FILE_PATH_OF_CSV_TEST
         else:
             self.path = setting.FILE_PATH_OF_CSV
+        self.index = CsvUrlIndex(self.path)
 
     def all(self) -> NewTrackModel:
         """ 
@@ -67,48 +74,62 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
             'message': ''
         })
 
-        tracks = []
-        # If there is no csv file, return empty list
+        tracks = list(self.iter_all())
+        if tracks:
+            logger_pro.info({
+                'action': 'Read all tracks from csv',
+                'status': 'Success',
+                'message': '',
+                'data': {
+                    'tracks_len': len(tracks)
+                }
+            })
+        else:
+            logger_pro.warning({
+                'action': 'Read all tracks from csv',
+                'status': 'Warning',
+                'message': 'There is no track on CSV'
+            })
+        return tracks
+
+    def iter_all(self):
+        """ 
+            Yield all tracks lazily, one row at a time.
+
+            The file is closed as soon as the caller stops iterating.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Warning
+                if there is no file or you set path up wrongly.
+            Exception
+                If it fails to read tracks. It is logged and the iteration stops.
+
+            Return
+            ------
+            tracks: generator
+                A generator of new track instances.
+        """
+        # If there is no csv file, yield nothing
         if not helper.exists_file(self.path):
-            return tracks
+            return
 
-        # If there is no header on csv file, return empty list
+        # If there is no header on csv file, yield nothing
         if not self.read_header():
-            return tracks
+            return
 
         try:
             with open(self.path, 'r', newline='') as csvfile:
                 csv_reader = csv.reader(csvfile)
                 next(csv_reader)
                 for row in csv_reader:
-                    track_dict = {}
-
-                    # Set track dict
-                    for r, c in zip(row, self.columns):
-                        track_dict[c] = r
-
                     # Set new track
-                    track = NewTrackModel()
-                    track.set_columns(track_dict)
-
-                    tracks.append(track)
-            if tracks:
-                logger_pro.info({
-                    'action': 'Read all tracks from csv',
-                    'status': 'Success',
-                    'message': '',
-                    'data': {
-                        'tracks_len': len(tracks)
-                    }
-                })
-            else:
-                logger_pro.warning({
-                    'action': 'Read all tracks from csv',
-                    'status': 'Warning',
-                    'message': 'There is no track on CSV'
-                })
-
-        except Exception as e:          
+                    yield NewTrackModel.from_row(row)
+        except Exception as e:
             logger_pro.error({
                 'action': 'Read all tracks from csv',
                 'status': 'Fails',
@@ -118,11 +139,96 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
                     'path': self.path
                 }
             })
-        return tracks
+
+    def iter_where(self, predicate):
+        """ 
+            Yield the tracks which match a condition lazily.
+
+            Parameters
+            ----------
+            predicate:
+                A callable which takes a new track instance and returns bool.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            tracks: generator
+                A generator of new track instances.
+        """
+        return (t for t in self.iter_all() if predicate(t))
 
     def add(self, track: NewTrackModel) -> None:
-        track_dict = track.get_dict()
-        self.write_dict(track_dict)
+        self.add_many([track])
+        return None
+
+    def add_many(self, tracks: list) -> None:
+        """ 
+            Write tracks on CSV with a single buffered file handle.
+
+            The file and the header are checked once,
+            all rows are written and the file is fsynced once.
+
+            Parameters
+            ----------
+            tracks: list or TrackBatch
+                New track instances to be written on CSV.
+
+            Raises
+            ------
+            Exception
+                If it fails to write on CSV
+
+            Return
+            ------
+            None
+        """
+        if not tracks:
+            return None
+
+        # Check there is csv file
+        if not helper.exists_file(self.path):
+            helper.create_file(self.path)
+
+        # Check there is header
+        has_header = self.read_header() is not None
+
+        logger_pro.debug(lambda: {
+            'action': 'Write tracks data on CSV',
+            'status': 'Run',
+            'message': '',
+            'data': {
+                'tracks_len': len(tracks)
+            }
+        })
+        try:
+            with open(self.path, 'a', newline='', buffering=self.BUFFER_SIZE) as csvfile:
+                writer = csv.writer(csvfile)
+                if not has_header:
+                    writer.writerow(self.columns)
+                    logger_pro.warning(f'Add header on csv ({self.path})')
+                writer.writerows(TrackBatch.rows_of(tracks))
+                csvfile.flush()
+                os.fsync(csvfile.fileno())
+            logger_pro.debug(lambda: {
+                'action': 'Write tracks data on CSV',
+                'status': 'Success',
+                'message': ''
+            })
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Write tracks data on CSV',
+                'status': 'Fails',
+                'message': '',
+                'exception': e,
+                'data': {
+                    'path': self.path,
+                    'tracks_len': len(tracks)
+                }
+            })
+            raise Exception
         return None
 
     def read_header(self) -> list:
@@ -144,7 +250,7 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
                 The header on the path of CSV.
         """
 
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Read header data from csv',
             'status': 'Run',
             'message': ''
@@ -155,7 +261,7 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
                 csv_dict_reader = csv.DictReader(csvfile)
                 header = csv_dict_reader.fieldnames
 
-            logger_pro.debug({
+            logger_pro.debug(lambda: {
                 'action': 'Read header data from csv',
                 'status': 'Success',
                 'message': '',
@@ -265,7 +371,7 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
         if self.read_header() is None:
             self.write_header()
     
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Write a track data on CSV',
             'status': 'Run',
             'message': ''
@@ -274,7 +380,7 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
             with open(self.path, 'a', newline='') as csvfile:
                 writer = csv.DictWriter(csvfile, fieldnames=self.columns)
                 writer.writerow(track)
-                logger_pro.debug({
+                logger_pro.debug(lambda: {
                     'action': 'Write a tarack data on CSV',
                     'status': 'Success',
                     'message': '',
@@ -294,7 +400,12 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
         """
             Find a track by url.
             
-            If there is no track on csv, return None.
+            The row is found through the url index next to the CSV,
+            so only that row is read. The index is brought up to date with
+            the CSV first, so a url it does not have is not on the CSV
+            and None is returned without a scan.
+            The whole CSV is scanned only if the index fails,
+            e.g. it can not be opened or its row is not the track.
 
             Parameters
             ----------
@@ -318,12 +429,30 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
             'status': 'Run',
             'message': ''
             })
+        if not helper.exists_file(self.path):
+            return None
+
         try:
-            tracks = self.all()
             track = None
-
-            for t in tracks:
-                if t.track_url == url:
+            track_id = track_id_from_url(url)
+            try:
+                offset = self.index.lookup(url)
+                if offset is not None:
+                    track = NewTrackModel.from_row(self.index.read_row(offset))
+                    if track_id_from_url(track.track_url) != track_id:
+                        # The CSV was changed under the index, so it is built again next time
+                        self.index.clear()
+                        raise Exception(f'The row at {offset} is not the track')
+            except Exception as e:
+                logger_pro.warning({
+                    'action': 'Find a track by url.',
+                    'status': 'Warning',
+                    'message': 'The url index is not available, so scan the whole CSV',
+                    'exception': e
+                })
+                # The last row wins, as the index does
+                track = None
+                for t in self.iter_where(lambda t: track_id_from_url(t.track_url) == track_id):
                     track = t
 
             if track:
@@ -332,7 +461,7 @@ class CsvNewTrackRepository(NewTrackRepoInterface):
                     'status': 'Success',
                     'message': '',
                     'data': {
-                        'track': vars(track)
+                        'track': track.get_dict()
                     }
                 })
             else:
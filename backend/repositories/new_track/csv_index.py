@@ -0,0 +1,319 @@
+import csv
+import hashlib
+import logging
+import os
+import sqlite3
+from contextlib import closing
+
+from utils.track_index import track_id_from_url
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class CsvUrlIndex():
+    """
+    A class used to represent a persistent index of track url to byte offset in a CSV.
+
+    The index is a small SQLite file next to the CSV. It remembers the size and mtime
+    of the CSV it was built from, and a hash of the last record it indexed.
+    If the CSV grew and that record is unchanged, the new rows are indexed
+    from the previous end of the file, otherwise the index is rebuilt.
+    When a track appears more than once, the last row wins.
+
+    Attributes
+    ----------
+    csv_path: str
+        A path of the CSV.
+    path: str
+        A path of the index.
+    column: str
+        The column of the CSV which has the track url.
+
+    Methods
+    ------
+    """
+
+    def __init__(self, csv_path: str, column: str = 'track_url'):
+        """
+        Parameters
+        ----------
+        csv_path: str
+            A path of the CSV.
+        column: str
+            The column of the CSV which has the track url.
+        """
+        self.csv_path = csv_path
+        self.path = csv_path + '.idx'
+        self.column = column
+
+    def lookup(self, url: str) -> int:
+        """
+            Find the byte offset of the row of a track.
+
+            Parameters
+            ----------
+            url: str
+                An url of track.
+
+            Raises
+            ------
+            Exception
+                If it fails to read or update the index.
+
+            Return
+            ------
+            offset: int
+                The byte offset of the row, or None if the track is not on the CSV.
+        """
+        with closing(self.connect()) as db, db:
+            self.update(db)
+            row = db.execute('SELECT offset FROM offsets WHERE track_id = ?',
+                             (track_id_from_url(url),)).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def connect(self) -> sqlite3.Connection:
+        """
+            Open the index, creating its tables on the first call.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to open the index.
+
+            Return
+            ------
+            db: sqlite3.Connection
+                A connection to the index.
+        """
+        db = sqlite3.connect(self.path)
+        db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+        db.execute('CREATE TABLE IF NOT EXISTS offsets (track_id TEXT PRIMARY KEY, offset INTEGER)')
+        return db
+
+    def refresh(self) -> None:
+        """
+            Update the index if the CSV changed since it was indexed.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to update the index.
+
+            Return
+            ------
+            None
+        """
+        with closing(self.connect()) as db, db:
+            self.update(db)
+        return None
+
+    def update(self, db) -> None:
+        """
+            Update an open index if the CSV changed since it was indexed.
+
+            Parameters
+            ----------
+            db:
+                An open connection of the index.
+
+            Raises
+            ------
+            Exception
+                If it fails to update the index.
+
+            Return
+            ------
+            None
+        """
+        stat = os.stat(self.csv_path)
+        meta = dict(db.execute('SELECT key, value FROM meta'))
+        size = meta.get('size', 0)
+        mtime = meta.get('mtime', 0)
+        tail = meta.get('tail', 0)
+        if size == stat.st_size and mtime == stat.st_mtime_ns:
+            return None
+
+        # Only appended to if the bytes indexed last time are still there
+        if 0 < size < stat.st_size and self.fingerprint(tail, size) == meta.get('tail_hash'):
+            start = size
+        else:
+            # The CSV was rewritten, so the old offsets are useless
+            db.execute('DELETE FROM offsets')
+            start = 0
+            tail = 0
+
+        logger_pro.info({
+            'action': 'Update the url index of CSV',
+            'status': 'Run',
+            'message': '',
+            'data': {
+                'path': self.path,
+                'start': start,
+                'size': stat.st_size
+            }
+        })
+        end, last = self.scan(db, start)
+        if last is not None:
+            tail = last
+        db.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                       [('size', end), ('mtime', stat.st_mtime_ns),
+                        ('tail', tail), ('tail_hash', self.fingerprint(tail, end))])
+        return None
+
+    def clear(self) -> None:
+        """
+            Drop the index, so that the next lookup rebuilds it.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to open the index.
+
+            Return
+            ------
+            None
+        """
+        with closing(self.connect()) as db, db:
+            db.execute('DELETE FROM meta')
+            db.execute('DELETE FROM offsets')
+        return None
+
+    def fingerprint(self, start: int, end: int) -> int:
+        """
+            Hash the bytes of the CSV between two offsets.
+
+            Parameters
+            ----------
+            start: int
+                The first byte offset.
+            end: int
+                The byte offset to stop at.
+
+            Raises
+            ------
+            Exception
+                If it fails to read the CSV.
+
+            Return
+            ------
+            fingerprint: int
+                A 56 bit hash, which fits in an INTEGER of SQLite.
+        """
+        with open(self.csv_path, 'rb') as f:
+            f.seek(start)
+            data = f.read(max(0, end - start))
+        return int.from_bytes(hashlib.blake2b(data, digest_size=7).digest(), 'big')
+
+    def scan(self, db, start: int) -> int:
+        """
+            Index the rows of the CSV from a byte offset.
+
+            Parameters
+            ----------
+            db:
+                An open connection of the index.
+            start: int
+                The byte offset to scan from. 0 means the header is read first.
+
+            Raises
+            ------
+            Exception
+                If it fails to read the CSV.
+
+            Return
+            ------
+            end: int
+                The byte offset the scan stopped at.
+            last: int
+                The byte offset of the last record read, or None if there was none.
+        """
+        with open(self.csv_path, 'rb') as f:
+            header = next(csv.reader([self.read_record(f).decode()]), [])
+            if self.column not in header:
+                return 0, None
+            position = header.index(self.column)
+
+            if start:
+                f.seek(start)
+            offsets = []
+            last = None
+            while True:
+                offset = f.tell()
+                record = self.read_record(f)
+                if not record:
+                    break
+                last = offset
+                row = next(csv.reader([record.decode()]), [])
+                if len(row) > position and row[position]:
+                    offsets.append((track_id_from_url(row[position]), offset))
+
+        # Rows come in file order, so the last row of a track wins
+        db.executemany('INSERT OR REPLACE INTO offsets (track_id, offset) VALUES (?, ?)', offsets)
+        return offset, last
+
+    def read_row(self, offset: int) -> list:
+        """
+            Read the row at a byte offset.
+
+            Parameters
+            ----------
+            offset: int
+                The byte offset of the row.
+
+            Raises
+            ------
+            Exception
+                If it fails to read the CSV.
+
+            Return
+            ------
+            row: list
+                The values of the row.
+        """
+        with open(self.csv_path, 'rb') as f:
+            f.seek(offset)
+            record = self.read_record(f)
+        return next(csv.reader([record.decode()]), [])
+
+    @classmethod
+    def read_record(cls, f) -> bytes:
+        """
+            Read a CSV record, which spans several lines when a quoted value has a newline.
+
+            Parameters
+            ----------
+            f:
+                A CSV file opened in binary mode.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            record: bytes
+                The record, or empty bytes at the end of the file.
+        """
+        record = f.readline()
+        while record.count(b'"') % 2:
+            line = f.readline()
+            if not line:
+                break
+            record += line
+        return record
@@ -1,14 +1,12 @@
 import logging
-import time
 
 from models.new_track import NewTrackModel
 from models.google_spreadsheet import GoogleSpreadsheet
 from repositories.new_track.interfaces.new_track_repository import NewTrackRepoInterface
 import utils.setting as setting
+from utils.logger import get_logger
 
-import gspread
-
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -24,13 +22,12 @@ class GssNewTrackRepository(NewTrackRepoInterface):
         Columns set up on model
     worksheet:
         An instance to connect Google Spreadsheet
-    sleep_time_sec: float
-        The sleep time by second for the interval 
-        to write on a Google Spreadsheet.
 
     Methods
     ------
     """
+    ROW_NUM_TO_ADD = 1000
+
     def __init__(self):
         """
         Parameters
@@ -39,10 +36,6 @@ class GssNewTrackRepository(NewTrackRepoInterface):
             A Google Spreadsheet model
         """
 
-        SHEET_SIZE_ERR_STATUS = "INVALID_ARGUMENT"
-        REQUEST_LIMIT_ERR_STATUS = "RESOURCE_EXHAUSTED"
-        ROW_NUM_TO_ADD = 1000
-
         key = setting.CONFIG['GOOGLE_API']['SPREAD_SHEET_KEY']
 
         if setting.ENV == 'dev':            
@@ -55,7 +48,8 @@ class GssNewTrackRepository(NewTrackRepoInterface):
         self.gss = GoogleSpreadsheet()
         self.workbook = self.gss.conn.open_by_key(key)
         self.worksheet = self.workbook.worksheet(sheet_name)
-        self.sleep_time_sec = 0.9
+        self.next_row = None
+        self.checked_header = False
 
     def all(self):
         return
@@ -83,79 +77,82 @@ class GssNewTrackRepository(NewTrackRepoInterface):
             ------
             None
         """
+        self.add_many([track])
+        return None
+
+    def add_many(self, tracks: list) -> None:
+        """ 
+            Add tracks on GSS with a single range update.
+
+            The next available row is looked up once and tracked locally,
+            and the header is checked once per repository instance.
+
+            Parameters
+            ----------
+            tracks: list
+                A list of new track instances to add on GSS
+
+            Raises
+            ------
+            Exception
+                If it fails to add tracks.
+
+            Return
+            ------
+            None
+        """
+        if not tracks:
+            return None
+
         # If the spreadsheet is empty, Add column on header(from (1,1))
-        # TODO: move this header validation outside of for statement
-        # if not self.has_header():
-        #     self.add_header()
-        print(self.has_header)
+        if not self.checked_header:
+            if not self.has_header():
+                self.add_header()
+            self.checked_header = True
 
-        logger_pro.debug({
-            'action': 'Add a track on GSS',
+        logger_pro.debug(lambda: {
+            'action': 'Add tracks on GSS',
             'status': 'Run',
             'message': '',
             'args': {
-                'track': vars(track)
+                'tracks_len': len(tracks)
             }
         })
 
-        values = []
-        for column in self.columns:
-            values.append(getattr(track, column))
-
-        attempts = 1
-        max_attempts = 3
-
-        while attempts <= max_attempts:
-            try:
-                row_num = self.__find_next_available_row()
-                self.worksheet.insert_row(values, row_num)
-            except ConnectionError as err:
-                attempts += 1
-                is_connection_err = True
-                logger_pro.error({
-                    'action': 'Add row',
-                    'status': 'Fail: connection error',
-                    'message': err
-                })
-                time.sleep(30)
-            except gspread.exceptions.APIError as err:
-                err_status = err.response.json()["error"]["status"]
-                is_sheet_size_err = bool(err_status == self.SHEET_SIZE_ERR_STATUS)
-                is_request_limit = bool(err_status == self.REQUEST_LIMIT_ERR_STATUS)
-
-                if is_sheet_size_err:
-                    # no row to add new data in the sheet.
-                    # warn("sheet size(row) is not enough. {0}: {1}", err.__class__.__name__, err)
-                    time.sleep(10)
-                    self.worksheet.add_rows(self.ROW_NUM_TO_ADD)
-                    # info("added {0} rows in the sheet({1})", self.ROW_NUM_TO_ADD, self.sheet_name)
-                elif is_request_limit:
-                    # request quota exceeded the limit
-                    # warn("request quota exceeded the limit. {0}: {1}", err.__class__.__name__, err)
-                    time.sleep(60)
-                else:
-                    attempts += 1
-                    mes = ("failed to add data into gss 3 times. ",
-                           "please check the log. "
-                           f"{err.__class__.__name__}: {err}")
-                    # error(mes)
-                    raise gspread.exceptions.APIError(mes)
-            else:
-                # success
-                # info("added data in the gss({0}).", self.sheet_name)
-                is_connection_err = False
-                break
-
-        if is_connection_err:
-            mes = ("failed to connect to gss 3 times. ",
-                   "please check your internet connection.")
-            # error(mes)
-            raise ConnectionError(mes)
-
-        time.sleep(1)
+        values = [[getattr(t, column) for column in self.columns] for t in tracks]
 
-        
-    
+        # Quota errors and connection errors are retried by the limiter of GoogleSpreadsheet
+        try:
+            from gspread.utils import rowcol_to_a1
+            if self.next_row is None:
+                self.next_row = self.find_next_available_row()
+            last_row = self.next_row + len(values) - 1
+            if last_row > self.worksheet.row_count:
+                self.worksheet.add_rows(max(self.ROW_NUM_TO_ADD, last_row - self.worksheet.row_count))
+            range_name = f'{rowcol_to_a1(self.next_row, 1)}:{rowcol_to_a1(last_row, len(self.columns))}'
+            self.worksheet.update(range_name=range_name, values=values, value_input_option='RAW')
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Add tracks on GSS',
+                'status': 'Fail',
+                'message': e,
+                'data': {
+                    'next_row': self.next_row,
+                    'tracks_len': len(tracks)
+                }
+            })
+            raise Exception
+
+        self.next_row += len(values)
+        logger_pro.debug(lambda: {
+            'action': 'Add tracks on GSS',
+            'status': 'Success',
+            'message': '',
+            'data': {
+                'next_row': self.next_row
+            }
+        })
+        return None
 
     def delete_by_url(self, url: str) -> None:
         pass
@@ -250,17 +247,3 @@ class GssNewTrackRepository(NewTrackRepoInterface):
         fist_column_data = list(filter(None, self.worksheet.col_values(1)))
         available_row = int(len(fist_column_data)) + 1
         return available_row
-
-    def __find_next_available_row(self) -> int:
-        """ Find a next available row on GSS
-            This is for confirming from which row is available
-            when you add data on GSS.
-
-        Returns:
-            int: _description_
-        """
-        # it is a list which contains all data on first column
-        fist_column_data = list(filter(None, self.worksheet.col_values(1)))
-        time.sleep(1)
-        available_row = int(len(fist_column_data)) + 1
-        return available_row
@@ -2,11 +2,15 @@ import logging
 
 from models.spotify import SpotifyModel
 from models.new_track import NewTrackModel
+from models.playlist import PlaylistModel
 from repositories.new_track.interfaces.new_track_repository import NewTrackRepoInterface
 import utils.setting as setting
-import utils.helper as helper
+from utils.clock import Clock, get_clock
+from utils.fetcher import Paginator
+import utils.projection as projection
+from utils.logger import get_logger
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 class SpotifyNewTrackRepository(NewTrackRepoInterface):
@@ -23,18 +27,24 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
         A playlist id for output 
     connect:
         An instance to connect spotify API.
+    clock: Clock
+        A clock which gives created_at.
 
     Methods
     -------
     """
-    def __init__(self):
+    # Spotify API accepts up to 100 items per request
+    MAX_ITEMS_PER_REQUEST = 100
+
+    def __init__(self, clock: Clock = None):
         """
         Parameters
         ----------
-        model:
-            A spotify model
+        clock: Clock
+            A clock which gives created_at. The run clock by default.
         """
         self.spotify = SpotifyModel()
+        self.clock = clock or get_clock()
         sheet_name = setting.CONFIG['GOOGLE_API']['SPREAD_SHEET_NAME']
         if setting.ENV == 'dev':
             self.playlist_id = setting.CONFIG['PLAYLIST_ID']['TEST']
@@ -74,8 +84,7 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
                 track_dict = self.extract_track_dict_from_json(track_json)
                 
                 # Create new track instance
-                track = NewTrackModel()
-                track.set_columns(track_dict)
+                track = NewTrackModel.from_dict(track_dict)
 
                 # Add track
                 tracks.append(track)
@@ -120,7 +129,7 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
             tracks: list
                 A tracks json data list gotten from the playlist.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': f'Fetch tracks json data from a playlist ({self.playlist_id}).',
             'status': 'Run',
             'message': ''
@@ -129,45 +138,26 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
 
         try:
             tracks_number = self.fetch_playlist_track_number()
-            max_number = 100
-            tracks_json = []
-            while max_number < tracks_number:
-                offset = len(tracks_json)
-                playlist_items = self.spotify.conn.playlist_items(self.playlist_id, limit=100, offset=offset)
-                current_tracks_json = playlist_items['items']
-                tracks_json += current_tracks_json
-                tracks_number -= len(current_tracks_json)
-                logger_pro.debug({
-                    'action': f'Fetch tracks json data from a playlist ({self.playlist_id}).',
-                    'status': 'Success',
-                    'message': '',
-                    'data': {
-                        'offset': offset,
-                        'until': offset + len(current_tracks_json),
-                        'length': len(current_tracks_json)
-                    }
-                })
-            else:
-                # after while loop or less than 100 tracks
-                offset = len(tracks_json)
-                playlist_items = self.spotify.conn.playlist_items(self.playlist_id, limit=100, offset=offset)
-                current_tracks_json = playlist_items['items']
-                tracks_json += current_tracks_json
-                logger_pro.debug({
-                    'action': f'Fetch tracks json data from a playlist ({self.playlist_id}).',
-                    'status': 'Success',
-                    'message': '',
-                    'data': {
-                        'offset': offset,
-                        'until': offset + len(current_tracks_json),
-                        'length': len(current_tracks_json)
-                    }
-                })
+            paginator = Paginator(
+                lambda offset: self.spotify.conn.playlist_items(self.playlist_id, limit=100, offset=offset,
+                                                                **projection.kwargs('playlist_items'))['items'],
+                limit=100,
+                max_workers=setting.SPOTIFY_MAX_WORKERS)
+            tracks_json = paginator.fetch(tracks_number)
+            logger_pro.debug(lambda: {
+                'action': f'Fetch tracks json data from a playlist ({self.playlist_id}).',
+                'status': 'Success',
+                'message': '',
+                'data': {
+                    'pages_len': len(paginator.offsets(tracks_number)),
+                    'length': len(tracks_json)
+                }
+            })
         except Exception as e:
             logger_pro.error({
                 'action': f'Fetch tracks json data from a playlist ({self.playlist_id}).',
                 'status': 'Fail',
-                'message': 'This is in a while loop',
+                'message': '',
                 'exception': e,
                 'data': {
                     'playlist_id': self.playlist_id
@@ -195,15 +185,14 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
             track_number: int
                 The number of tracks in a playlist.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': f'Fetch a playlist track number. ({self.playlist_id}) ',
             'status': 'Run',
             'message': ''
         })
         try:
-            playlist_data = self.spotify.conn.playlist(self.playlist_id)
-            track_number = playlist_data['tracks']['total']
-            logger_pro.debug({
+            track_number = PlaylistModel.fetch(self.playlist_id, self.spotify.conn).total
+            logger_pro.debug(lambda: {
                 'action': f'Fetch a playlist track number. ({self.playlist_id}) ',
                 'status': 'Success',
                 'message': '',
@@ -243,24 +232,14 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
             track: dict
                 A track dict with certain keys
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Extract a track from tracks json data.',
             'status': 'Run',
             'message': ''
         })
         try:
-            track = {
-                'name': track_json['name'],
-                'artist': track_json['artists'][0]['name'],
-                'playlist_name': None,
-                'track_url': track_json['external_urls']['spotify'],
-                'playlist_url': None,
-                'release_date': track_json["album"]["release_date"],
-                'added_at': None,
-                'created_at': helper.get_date(),
-                'like': False
-            }
-            logger_pro.debug({
+            track = NewTrackModel.from_spotify_json(track_json, self.clock.date).get_dict()
+            logger_pro.debug(lambda: {
                 'action': 'Extract a track from tracks json data.',
                 'status': 'Success',
                 'message': '',
@@ -303,7 +282,7 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
             ------
             None
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Add a track on Spotify',
             'status': 'Run',
             'message': ''
@@ -311,11 +290,12 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
         try:
             url = [track.track_url]
             self.spotify.conn.playlist_add_items(self.playlist_id, url, position=0)
-            logger_pro.debug({
+            PlaylistModel.invalidate(self.playlist_id)
+            logger_pro.debug(lambda: {
                 'action': 'Add a track on Spotify',
                 'status': 'Success',
                 'message': '',
-                'data': vars(track)
+                'data': track.get_dict()
             })
         except Exception as e:
             logger_pro.error({
@@ -323,7 +303,7 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
                 'status': 'Fail',
                 'message': '',
                 'exception': e,
-                'data': vars(track)
+                'data': track.get_dict()
             })
             raise Exception
         
@@ -331,6 +311,65 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
     
     
 
+    def add_many(self, tracks: list) -> None:
+        """ 
+            Add tracks on Spotify in chunks of up to 100 tracks.
+
+            The playlist ends up in the same order as calling add
+            for each track: the last track of the list is on the top.
+
+            Parameters
+            ----------
+            tracks: list
+                A list of new track instances to add on Spotify
+
+            Raises
+            ------
+            Exception
+                If it fails to add tracks.
+
+            Return
+            ------
+            None
+        """
+        logger_pro.debug(lambda: {
+            'action': 'Add tracks on Spotify',
+            'status': 'Run',
+            'message': ''
+        })
+        if not tracks:
+            return None
+
+        urls = [t.track_url for t in reversed(tracks)]
+        try:
+            for position in range(0, len(urls), self.MAX_ITEMS_PER_REQUEST):
+                chunk = urls[position:position + self.MAX_ITEMS_PER_REQUEST]
+                self.spotify.conn.playlist_add_items(self.playlist_id, chunk, position=position)
+                logger_pro.debug(lambda: {
+                    'action': 'Add tracks on Spotify',
+                    'status': 'Success',
+                    'message': '',
+                    'data': {
+                        'position': position,
+                        'length': len(chunk)
+                    }
+                })
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Add tracks on Spotify',
+                'status': 'Fail',
+                'message': '',
+                'exception': e,
+                'data': {
+                    'tracks_len': len(urls)
+                }
+            })
+            raise Exception
+        finally:
+            PlaylistModel.invalidate(self.playlist_id)
+
+        return None
+
     def convert_tracks_dict_into_new_tracks(self, tracks_dict) -> NewTrackModel:
         """
             Convert tracks dict into new tracks model
@@ -358,21 +397,14 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
         new_tracks = []
         try:
             for t_dic in tracks_dict:
-                new_track = NewTrackModel(t_dic['name'],
-                                          t_dic['artist'],
-                                          t_dic['playlist_name'],
-                                          t_dic['track_url'],
-                                          t_dic['playlist_url'],
-                                          t_dic['added_at'],
-                                          t_dic['created_at'],
-                                          t_dic['like'])
+                new_track = NewTrackModel.from_dict(t_dic)
                 new_tracks.append(new_track)
-                logger_pro.debug({
+                logger_pro.debug(lambda: {
                     'action': 'Convert tracks dict into new tracks model',
                     'status': 'Success',
                     'message': '',
                     'data': {
-                        'new_track': new_track
+                        'new_track': new_track.get_dict()
                     }
                 })
             logger_pro.info({
@@ -414,7 +446,7 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
             ------
             None
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Delete tracks.',
             'status': 'Run',
             'message': ''
@@ -422,12 +454,13 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
         try:
             url = [track.track_url]
             self.spotify.conn.playlist_remove_all_occurrences_of_items(self.playlist_id, url)
-            logger_pro.debug({
+            PlaylistModel.invalidate(self.playlist_id)
+            logger_pro.debug(lambda: {
                 'action': 'Delete tracks.',
                 'status': 'Success',
                 'message': '',
                 'data': {
-                    'track': vars(track)
+                    'track': track.get_dict()
                 }
             })
         except Exception as e:
@@ -438,8 +471,82 @@ class SpotifyNewTrackRepository(NewTrackRepoInterface):
                 'exception': e,
                 'args': {
                     'playlist_id': self.playlist_id,
-                    'track': vars(track)
+                    'track': track.get_dict()
                 }
             })
             raise Exception
-        return None
\ No newline at end of file
+        return None
+
+    def delete_many(self, tracks: list) -> list:
+        """ 
+            Delete tracks in chunks of up to 100 tracks.
+
+            Every request is pinned to the snapshot_id of the playlist,
+            and the snapshot_id returned by a request is used for the next one.
+            A failed chunk does not stop the others.
+
+            Parameters
+            ----------
+            tracks: list
+                A list of new track instances to delete.
+
+            Raises
+            ------
+            Exception
+                If you can not fetch the snapshot_id of the playlist.
+
+            Return
+            ------
+            results: list
+                A result dict per chunk with the keys
+                chunk, tracks_len, snapshot_id, status and exception.
+        """
+        logger_pro.debug(lambda: {
+            'action': 'Delete tracks in chunks.',
+            'status': 'Run',
+            'message': ''
+        })
+        results = []
+        if not tracks:
+            return results
+
+        urls = list(dict.fromkeys(t.track_url for t in tracks))
+        snapshot_id = PlaylistModel.fetch(self.playlist_id, self.spotify.conn).snapshot_id
+        for i, start in enumerate(range(0, len(urls), self.MAX_ITEMS_PER_REQUEST), start=1):
+            chunk = urls[start:start + self.MAX_ITEMS_PER_REQUEST]
+            result = {
+                'chunk': i,
+                'tracks_len': len(chunk),
+                'snapshot_id': snapshot_id,
+                'status': 'Success',
+                'exception': None
+            }
+            try:
+                response = self.spotify.conn.playlist_remove_all_occurrences_of_items(
+                    self.playlist_id, chunk, snapshot_id=snapshot_id)
+                snapshot_id = response['snapshot_id']
+                result['snapshot_id'] = snapshot_id
+                logger_pro.debug(lambda: {
+                    'action': 'Delete tracks in chunks.',
+                    'status': 'Success',
+                    'message': '',
+                    'data': result
+                })
+            except Exception as e:
+                result['status'] = 'Fail'
+                result['exception'] = e
+                logger_pro.error({
+                    'action': 'Delete tracks in chunks.',
+                    'status': 'Fail',
+                    'message': '',
+                    'exception': e,
+                    'data': {
+                        'playlist_id': self.playlist_id,
+                        'chunk': i,
+                        'tracks': chunk
+                    }
+                })
+            results.append(result)
+
+        PlaylistModel.invalidate(self.playlist_id)
+        return results
@@ -1 +1,381 @@
+import csv
+import logging
 import sqlite3
+
+from models.new_track import NewTrackModel
+from models.track_batch import TrackBatch
+from repositories.new_track.interfaces.new_track_repository import NewTrackRepoInterface
+import utils.helper as helper
+import utils.setting as setting
+from utils.logger import get_logger
+from utils.track_index import track_id_from_url
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class SqliteTrackRepository(NewTrackRepoInterface):
+    """
+    A class used to represent a SQLite repository of the track history.
+
+    It runs in WAL mode with parameterized statements (kept in the statement
+    cache of the connection), a unique index on the track ID and secondary
+    indexes on artist, playlist_name and created_at.
+    The track ID is normalized from the track url (utils.track_index),
+    so a url in another form finds the same track. A track added again
+    replaces the stored one and moves to the end, so the last one wins as on the CSV.
+    Liked tracks imported from CSV are kept in their own table.
+
+    Attributes
+    ----------
+    model:
+        A new track model
+    columns: list
+        Columns set up on model
+    path: str
+        A path of the SQLite database
+    conn: sqlite3.Connection
+        A connection to the database
+
+    Methods
+    ------
+    """
+    LIKED_COLUMNS = ['name', 'artist', 'url', 'release_date', 'added_at', 'created_at']
+
+    SCHEMA = [
+        '''CREATE TABLE IF NOT EXISTS tracks (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            artist TEXT,
+            playlist_name TEXT,
+            track_url TEXT NOT NULL,
+            playlist_url TEXT,
+            release_date TEXT,
+            added_at TEXT,
+            created_at TEXT,
+            "like" TEXT,
+            track_id TEXT
+        )''',
+        'CREATE INDEX IF NOT EXISTS tracks_artist ON tracks (artist)',
+        'CREATE INDEX IF NOT EXISTS tracks_playlist_name ON tracks (playlist_name)',
+        'CREATE INDEX IF NOT EXISTS tracks_created_at ON tracks (created_at)',
+        '''CREATE TABLE IF NOT EXISTS liked_tracks (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            artist TEXT,
+            url TEXT,
+            release_date TEXT,
+            added_at TEXT,
+            created_at TEXT
+        )''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS liked_tracks_url_name ON liked_tracks (url, name)',
+        'CREATE INDEX IF NOT EXISTS liked_tracks_artist ON liked_tracks (artist)',
+        'CREATE INDEX IF NOT EXISTS liked_tracks_created_at ON liked_tracks (created_at)'
+    ]
+
+    SELECT_ALL = ('SELECT name, artist, playlist_name, track_url, playlist_url, '
+                  'release_date, added_at, created_at, "like" FROM tracks ORDER BY id')
+    SELECT_BY_TRACK_ID = ('SELECT name, artist, playlist_name, track_url, playlist_url, '
+                          'release_date, added_at, created_at, "like" FROM tracks WHERE track_id = ?')
+    INSERT = ('INSERT OR REPLACE INTO tracks (name, artist, playlist_name, track_url, playlist_url, '
+              'release_date, added_at, created_at, "like", track_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+    DELETE_BY_TRACK_ID = 'DELETE FROM tracks WHERE track_id = ?'
+
+    # Databases created before the track_id column get it on open
+    SELECT_WITHOUT_TRACK_ID = 'SELECT id, track_url FROM tracks WHERE track_id IS NULL'
+    UPDATE_TRACK_ID = 'UPDATE tracks SET track_id = ? WHERE id = ?'
+    SELECT_INDEX = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?"
+    OLD_INDEXES = ['tracks_track_url', 'tracks_track_id']
+    DELETE_REPLACED = 'DELETE FROM tracks WHERE id NOT IN (SELECT MAX(id) FROM tracks GROUP BY track_id)'
+    TRACK_ID_INDEX_NAME = 'tracks_track_id_key'
+    TRACK_ID_INDEX = f'CREATE UNIQUE INDEX IF NOT EXISTS {TRACK_ID_INDEX_NAME} ON tracks (track_id)'
+    TRACK_URL_POSITION = NewTrackModel.COLUMNS.index('track_url')
+    INSERT_LIKED = ('INSERT OR IGNORE INTO liked_tracks (name, artist, url, release_date, added_at, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)')
+
+    def __init__(self, path: str = None):
+        """
+        Parameters
+        ----------
+        path: str
+            A path of the SQLite database. It is set up by the config by default.
+        """
+        self.model = NewTrackModel()
+        self.columns = self.model.get_columns()
+
+        if path is not None:
+            self.path = path
+        elif setting.ENV == 'dev':
+            self.path = setting.FILE_PATH_OF_SQLITE_TEST
+        else:
+            self.path = setting.FILE_PATH_OF_SQLITE
+
+        self.conn = sqlite3.connect(self.path, cached_statements=64)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            for statement in self.SCHEMA:
+                self.conn.execute(statement)
+        self.migrate()
+
+    def migrate(self) -> None:
+        """
+            Key a database created with the unique track url on the track ID.
+
+            The track_id column is added and filled in. Of the tracks with the same ID,
+            the last one added is kept, as INSERT OR REPLACE does.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to migrate the database.
+
+            Return
+            ------
+            None
+        """
+        columns = [r[1] for r in self.conn.execute('PRAGMA table_info(tracks)')]
+        with self.conn:
+            if 'track_id' not in columns:
+                self.conn.execute('ALTER TABLE tracks ADD COLUMN track_id TEXT')
+            rows = self.conn.execute(self.SELECT_WITHOUT_TRACK_ID).fetchall()
+            self.conn.executemany(self.UPDATE_TRACK_ID, ((track_id_from_url(url), i) for i, url in rows))
+            replaced = 0
+            if self.conn.execute(self.SELECT_INDEX, (self.TRACK_ID_INDEX_NAME,)).fetchone() is None:
+                for index in self.OLD_INDEXES:
+                    self.conn.execute(f'DROP INDEX IF EXISTS {index}')
+                replaced = self.conn.execute(self.DELETE_REPLACED).rowcount
+                self.conn.execute(self.TRACK_ID_INDEX)
+        if rows or replaced:
+            logger_pro.info({
+                'action': 'Key the tracks on the track ID on SQLite',
+                'status': 'Success',
+                'message': '',
+                'data': {
+                    'filled_len': len(rows),
+                    'replaced_len': replaced
+                }
+            })
+        return None
+
+    def all(self) -> list:
+        """
+            Read all tracks.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to read tracks.
+
+            Return
+            ------
+            tracks: list
+                A list of new track instances in the order they were added.
+        """
+        tracks = list(self.iter_all())
+        logger_pro.info({
+            'action': 'Read all tracks from SQLite',
+            'status': 'Success',
+            'message': '',
+            'data': {
+                'tracks_len': len(tracks)
+            }
+        })
+        return tracks
+
+    def iter_all(self):
+        """
+            Yield all tracks lazily from a cursor.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            Exception
+                If it fails to read tracks.
+
+            Return
+            ------
+            tracks: generator
+                A generator of new track instances in the order they were added.
+        """
+        for row in self.conn.execute(self.SELECT_ALL):
+            yield self.to_track(row)
+
+    def iter_where(self, predicate):
+        return (t for t in self.iter_all() if predicate(t))
+
+    def find_by_url(self, url: str) -> NewTrackModel:
+        """
+            Find a track by url.
+
+            The url is matched on its track ID, so a url with a query string
+            or a spotify:track: uri finds the track too.
+            If there is no track, return None.
+
+            Parameters
+            ----------
+            url: str
+                An url of track.
+
+            Raises
+            ------
+            Exception
+                If it fails to find a track.
+
+            Return
+            ------
+            track: NewTrackModel
+                A new track instance found by url.
+        """
+        row = self.conn.execute(self.SELECT_BY_TRACK_ID, (track_id_from_url(url),)).fetchone()
+        if row is None:
+            logger_pro.warning({
+                'action': 'Find a track by url.',
+                'status': 'Warning',
+                'message': 'You could not find a track on SQLite',
+                'url': url
+            })
+            return None
+        return self.to_track(row)
+
+    def add(self, track: NewTrackModel) -> None:
+        self.add_many([track])
+        return None
+
+    def add_many(self, tracks: list) -> None:
+        """
+            Insert tracks in a single transaction.
+
+            A track whose track ID is already stored replaces it.
+
+            Parameters
+            ----------
+            tracks: list or TrackBatch
+                New track instances.
+
+            Raises
+            ------
+            Exception
+                If it fails to insert tracks.
+
+            Return
+            ------
+            None
+        """
+        if not tracks:
+            return None
+        try:
+            with self.conn:
+                self.conn.executemany(self.INSERT, (self.to_row(r) for r in TrackBatch.rows_of(tracks)))
+            logger_pro.debug(lambda: {
+                'action': 'Insert tracks on SQLite',
+                'status': 'Success',
+                'message': '',
+                'data': {
+                    'tracks_len': len(tracks)
+                }
+            })
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Insert tracks on SQLite',
+                'status': 'Fail',
+                'message': '',
+                'exception': e,
+                'data': {
+                    'path': self.path
+                }
+            })
+            raise Exception
+        return None
+
+    def delete_by_url(self, url: str) -> None:
+        with self.conn:
+            self.conn.execute(self.DELETE_BY_TRACK_ID, (track_id_from_url(url),))
+        return None
+
+    def import_new_tracks_csv(self, path: str) -> int:
+        """
+            Import the tracks of a new tracks CSV (tracks.csv).
+
+            Parameters
+            ----------
+            path: str
+                A path of the CSV.
+
+            Raises
+            ------
+            Exception
+                If it fails to import.
+
+            Return
+            ------
+            count: int
+                The number of rows inserted.
+        """
+        if not helper.exists_file(path):
+            return 0
+        with open(path, 'r', newline='') as csvfile, self.conn:
+            before = self.conn.total_changes
+            rows = (self.to_row(tuple(r.get(c) for c in self.columns)) for r in csv.DictReader(csvfile))
+            self.conn.executemany(self.INSERT, rows)
+            count = self.conn.total_changes - before
+        logger_con.info(f'Imported {count} tracks from {path}')
+        return count
+
+    def import_liked_tracks_csv(self, path: str) -> int:
+        """
+            Import the tracks of a liked tracks CSV (liked_tracks.csv).
+
+            Parameters
+            ----------
+            path: str
+                A path of the CSV.
+
+            Raises
+            ------
+            Exception
+                If it fails to import.
+
+            Return
+            ------
+            count: int
+                The number of rows inserted.
+        """
+        if not helper.exists_file(path):
+            return 0
+        with open(path, 'r', newline='') as csvfile, self.conn:
+            before = self.conn.total_changes
+            rows = (tuple(r.get(c) for c in self.LIKED_COLUMNS) for r in csv.DictReader(csvfile))
+            self.conn.executemany(self.INSERT_LIKED, rows)
+            count = self.conn.total_changes - before
+        logger_con.info(f'Imported {count} liked tracks from {path}')
+        return count
+
+    def to_row(self, row: tuple) -> tuple:
+        # Store values the way the CSV does, e.g. False as 'False', and the track ID last
+        return tuple(str(v) if isinstance(v, bool) else v for v in row) + \
+            (track_id_from_url(row[self.TRACK_URL_POSITION]),)
+
+    def to_track(self, row: tuple) -> NewTrackModel:
+        return NewTrackModel.from_row(row)
+
+
+if __name__ == '__main__':
+    # One-shot import: python -m repositories.track.sqlite
+    from repositories.new_track.csv import CsvNewTrackRepository
+    from repositories.licked_track.csv import CsvLikedTrackRepository
+
+    repository = SqliteTrackRepository()
+    repository.import_new_tracks_csv(CsvNewTrackRepository().path)
+    repository.import_liked_tracks_csv(CsvLikedTrackRepository().path)
@@ -3,9 +3,16 @@ import logging
 from models.spotify import SpotifyModel
 from repositories.licked_track.csv import CsvLikedTrackRepository
 from repositories.licked_track.google_spreadsheet import GssLikedTrackRepository
-import utils.helper as helper
+from repositories.licked_track.sqlite import SqliteLikedTrackRepository
+from repositories.licked_track.watermark import LikedTrackWatermark
+import utils.setting as setting
+from utils.clock import Clock, get_clock
+from utils.fetcher import Paginator
+import utils.projection as projection
+from utils.logger import get_logger
+from utils.track_index import TrackIdentityIndex
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -15,81 +22,249 @@ class LikedTrackService():
 
         Attributes
         ----------
-        None
+        clock: Clock
+            A clock which gives created_at.
+        newest: dict
+            {'added_at': str, 'track_id': str} of the newest saved track of the last fetch,
+            which is the next watermark.
 
         Methods
         ------
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, clock: Clock = None):
+        """
+            Parameters
+            ----------
+            clock: Clock
+                A clock which gives created_at. The run clock by default.
+        """
+        self.clock = clock or get_clock()
+        self.newest = None
+
+    def retreave_liked_tracks(self, since: dict = None, max_workers: int = None) -> list:
+        """
+            Fetch saved tracks, newest first.
+
+            With a watermark the pages are fetched one by one until it is reached.
+            Without one, the first page gives the total and the other pages are
+            fetched in parallel and put back together in order.
 
-    def retreave_liked_tracks(self) -> list:
-        """[TODO:summary]
+            Parameters
+            ----------
+            since: dict
+                A watermark {'added_at': str, 'track_id': str}. Paging stops at the first
+                track added before it, or at the track itself. If None, fetch all.
+            max_workers: int
+                The maximum number of pages fetched at the same time. [SPOTIPY] MAX_WORKERS by default.
 
-        [TODO:description]
+            Raises
+            ------
+            None
+                A failure is logged. A full fetch returns the pages which succeeded,
+                an incremental fetch returns an empty list.
 
-        Returns:
-            [TODO:description]
+            Return
+            ------
+            tracks: list
+                Liked track dicts newer than the watermark. If some pages of a full fetch
+                failed, the tracks of the other pages, and newest is None.
         """
+        self.newest = None
+        if max_workers is None:
+            max_workers = setting.SPOTIFY_MAX_WORKERS
+        sp = SpotifyModel()
+        limit = 50
+        tracks = []
+        created_at = self.clock.date
+        market = projection.kwargs('current_user_saved_tracks')
+
         try:
-            sp = SpotifyModel()
-            total = 0
-            remaining = 1
-            offset = 0
-            limit = 50
-            tracks = []
-
-            while remaining > 0:
-                logger_con.info(f"start: limit: {limit} offset: {offset} remaining: {remaining}")
-                data = sp.conn.current_user_saved_tracks(limit=limit, offset=offset)
-                if total == 0:
-                    total = int(data["total"])
-                    remaining = total
+            data = sp.conn.current_user_saved_tracks(limit=limit, offset=0, **market)
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Fetch liked tracks',
+                'status': 'Fail',
+                'message': '',
+                'exception': e
+            })
+            return []
 
-                offset += limit
-                items = data["items"]
-                for item in items:
-                    name = item["track"]["name"]
-                    artists = item["track"]["album"]["artists"]
-                    if len(artists) > 1:
-                        artist = []
-                        for a in artists:
-                            artist.append(a["name"])
-                    else:
-                        artist = item["track"]["album"]["artists"][0]["name"]
-                    url = item["track"]["album"]["external_urls"]["spotify"]
-                    release_date = item["track"]["album"]["release_date"]
-                    added_at = item["added_at"].split("T")[0]
-
-                    tracks.append({
-                        "name": name,
-                        "artist": artist,
-                        "url": url,
-                        "release_date": release_date,
-                        "added_at": added_at,
-                        'created_at': helper.get_date()
-                    })
-
-                logger_con.info("end")
-                remaining -= limit
+        total = int(data["total"])
+        items = data["items"]
+        newest = None
+        if items:
+            newest = {'added_at': items[0]["added_at"], 'track_id': items[0]["track"]["id"]}
 
+        if since is None:
+            paginator = Paginator(
+                lambda offset: sp.conn.current_user_saved_tracks(limit=limit, offset=offset, **market)["items"],
+                limit=limit,
+                max_workers=max_workers)
+            rest, failed = paginator.fetch_partial(total, start=limit)
+            tracks = [self.to_liked_track(item, created_at) for item in items + rest]
+            # Missing pages would be skipped by the next incremental sync
+            self.newest = None if failed else newest
+            logger_pro.info({
+                'action': 'Fetch liked tracks',
+                'status': 'Warning' if failed else 'Success',
+                'message': 'Fetched in parallel',
+                'data': {
+                    'tracks_len': len(tracks),
+                    'total': total,
+                    'failed_offsets': failed
+                }
+            })
             return tracks
 
-        except Exception as err:
-            print(err)
+        offset = 0
+        try:
+            while True:
+                for item in items:
+                    if self.reached(item, since):
+                        self.newest = newest
+                        logger_pro.info({
+                            'action': 'Fetch liked tracks',
+                            'status': 'Success',
+                            'message': 'Reached the watermark',
+                            'data': {
+                                'tracks_len': len(tracks),
+                                'requests': offset // limit + 1
+                            }
+                        })
+                        return tracks
+                    tracks.append(self.to_liked_track(item, created_at))
+
+                offset += limit
+                if offset >= total or not items:
+                    break
+                logger_con.info(f"start: limit: {limit} offset: {offset} total: {total}")
+                items = sp.conn.current_user_saved_tracks(limit=limit, offset=offset, **market)["items"]
+
+        except Exception as e:
+            # A sync after the watermark is not diffed against the CSV, so tracks
+            # returned here would be written again by the next sync
+            logger_pro.error({
+                'action': 'Fetch liked tracks',
+                'status': 'Fail',
+                'message': 'Nothing is synced until the next run',
+                'exception': e,
+                'data': {
+                    'tracks_len': len(tracks),
+                    'offset': offset
+                }
+            })
             return []
 
+        self.newest = newest
+        return tracks
+
+    @classmethod
+    def to_liked_track(cls, item: dict, created_at: str) -> dict:
+        """
+            Convert a saved track json data into a liked track dict.
+
+            Parameters
+            ----------
+            item: dict
+                An item of current_user_saved_tracks.
+            created_at: str
+                The date of the run.
+
+            Raises
+            ------
+            KeyError
+                If the json data lacks a field.
+
+            Return
+            ------
+            track: dict
+                A liked track dict.
+        """
+        artists = item["track"]["album"]["artists"]
+        if len(artists) > 1:
+            artist = [a["name"] for a in artists]
+        else:
+            artist = artists[0]["name"]
+
+        return {
+            "name": item["track"]["name"],
+            "artist": artist,
+            "url": projection.original(item["track"])["external_urls"]["spotify"],
+            "release_date": item["track"]["album"]["release_date"],
+            "added_at": item["added_at"].split("T")[0],
+            'created_at': created_at
+        }
+
+    @classmethod
+    def reached(cls, item: dict, since: dict) -> bool:
+        # Tracks saved at the same second keep going until the watermark track itself
+        if item["added_at"] < since["added_at"]:
+            return True
+        return item["added_at"] == since["added_at"] and item["track"]["id"] == since.get("track_id")
+
+    @classmethod
+    def liked_repository(cls):
+        """
+            Get the repository of the liked tracks set up by the config.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            repository: CsvLikedTrackRepository or SqliteLikedTrackRepository
+                The repository chosen by [APP] TRACK_STORE.
+        """
+        if setting.TRACK_STORE == 'sqlite':
+            return SqliteLikedTrackRepository()
+        return CsvLikedTrackRepository()
+
     def get_all_tracks(self):
-        csv_repository = CsvLikedTrackRepository()
-        tracks = csv_repository.get_all()
+        repository = self.liked_repository()
+        tracks = repository.get_all()
         return tracks
 
+    @classmethod
+    def index_tracks(cls, tracks) -> TrackIdentityIndex:
+        """
+            Index liked tracks by their identity.
+
+            Parameters
+            ----------
+            tracks: iterable
+                Liked track dicts. It can be a generator.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            known: TrackIdentityIndex
+                The liked tracks keyed by track ID, or by name and artist
+                for the rows written with an album url.
+        """
+        return TrackIdentityIndex(tracks)
+
+    def watermark(self) -> LikedTrackWatermark:
+        return LikedTrackWatermark(self.liked_repository().path)
+
+    def iter_all_tracks(self):
+        repository = self.liked_repository()
+        return repository.iter_all()
+
     def write_to_csv(self, tracks: list):
-        csv_repository = CsvLikedTrackRepository()
-        gss_repo = GssLikedTrackRepository()
-        for track in tracks:
-            print(track)
+        # The CSV, or the SQLite store with [APP] TRACK_STORE = sqlite
+        repository = self.liked_repository()
+        repository.add_tracks(tracks)
+        self.write_to_gss(tracks)
 
-            csv_repository.add_track(track)
-            gss_repo.add_track(track)
+    def write_to_gss(self, tracks: list):
+        gss_repo = GssLikedTrackRepository()
+        gss_repo.add_tracks(tracks)
@@ -1,14 +1,26 @@
+import csv
+import json
 import logging
+import sys
 import time
 
 from models.spotify import SpotifyModel
 from models.new_track import NewTrackModel
+from models.playlist import PlaylistModel
 from repositories.new_track.spotify import SpotifyNewTrackRepository
 from repositories.new_track.csv import CsvNewTrackRepository
 from repositories.new_track.google_spreadsheet import GssNewTrackRepository
+from repositories.track.sqlite import SqliteTrackRepository
 import utils.helper as helper
-
-logger_pro = logging.getLogger('production')
+import utils.setting as setting
+from utils.clock import Clock, get_clock
+from utils.fetcher import Paginator, PlaylistFetcher
+import utils.projection as projection
+from utils.response_cache import get_cache
+from utils.track_index import TrackIndex
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -32,6 +44,28 @@ class NewTrackService():
         """
         pass
 
+    @classmethod
+    def history_repository(cls):
+        """
+            Get the repository of the track history set up by the config.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            repository: CsvNewTrackRepository or SqliteTrackRepository
+                The repository chosen by [APP] TRACK_STORE.
+        """
+        if setting.TRACK_STORE == 'sqlite':
+            return SqliteTrackRepository()
+        return CsvNewTrackRepository()
+
     @classmethod
     def fetch_tracks_dict_from_playlists(cls) -> list:
         """
@@ -78,17 +112,43 @@ class NewTrackService():
         })
 
         try:
+            spotify = SpotifyModel()
+            fetcher = PlaylistFetcher(spotify.conn, max_workers=setting.SPOTIFY_MAX_WORKERS)
+
+            # A playlist whose snapshot_id has not changed is taken from the cache
+            # without fetching its pages or extracting them again
+            cache = get_cache()
+            cached_tracks_dict = {}
+            if cache is not None:
+                for playlist in fetcher.fetch_playlists(playlist_ids):
+                    tracks_dict = cache.get_json(NewTrackService.snapshot_key(playlist.playlist_id), 'snapshot',
+                                                 NewTrackService.snapshot_tag(playlist))
+                    if tracks_dict is not None:
+                        cached_tracks_dict[playlist.playlist_id] = tracks_dict
+
+            # Fetch json data of the other playlists concurrently
+            changed_ids = [p_id for p_id in playlist_ids if p_id not in cached_tracks_dict]
+            playlists_json = dict(zip(changed_ids, fetcher.fetch(changed_ids)))
+
+            # Keep the order of playlist_ids so that the first playlist wins on duplicates
+            created_at = get_clock().date
             for p_id in playlist_ids:
-                # Fetch json data
-                tracks_json = NewTrackService.fetch_tracks_json_from_playlist(p_id)
-                # Extract only the data we need
-                tracks_json = [t['track'] for t in tracks_json]
-                # Remove None in the list
-                tracks_json = filter(None, tracks_json)
-                # Extract track data
-                tracks_dict = [NewTrackService.extract_track_dict_from_json(t) for t in tracks_json]
-                # Remove None from tracks_dict
-                tracks_dict = [t for t in tracks_dict if t is not None]
+                if p_id in cached_tracks_dict:
+                    tracks_dict = [dict(t, created_at=created_at) for t in cached_tracks_dict[p_id]]
+                else:
+                    # Extract only the data we need
+                    tracks_json = [t['track'] for t in playlists_json[p_id]]
+                    # Remove None in the list
+                    tracks_json = filter(None, tracks_json)
+                    # Extract track data
+                    tracks_dict = [NewTrackService.extract_track_dict_from_json(t) for t in tracks_json]
+                    # Remove None from tracks_dict
+                    tracks_dict = [t for t in tracks_dict if t is not None]
+                    if cache is not None:
+                        playlist = PlaylistModel.fetch(p_id, spotify.conn)
+                        if playlist.snapshot_id:
+                            cache.put_json(NewTrackService.snapshot_key(p_id), 'snapshot',
+                                           NewTrackService.snapshot_tag(playlist), tracks_dict)
                 # Remove duplicated tracks amoung the playlists
                 if new_tracks_dict:
                     tracks_dict, _ = NewTrackService.retrieve_unique_and_duplicate_tracks_dict(
@@ -126,6 +186,34 @@ class NewTrackService():
 
         return new_tracks_dict
 
+    @classmethod
+    def snapshot_key(cls, playlist_id: str) -> str:
+        return f'snapshot {playlist_id}'
+
+    @classmethod
+    def snapshot_tag(cls, playlist: PlaylistModel) -> str:
+        """
+            Get the version of the tracks extracted from a playlist.
+
+            It changes when the playlist changes (snapshot_id)
+            and when the projection of the pages changes.
+
+            Parameters
+            ----------
+            playlist: PlaylistModel
+                The playlist metadata.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            tag: str
+                The version.
+        """
+        return f"{playlist.snapshot_id} {json.dumps(projection.kwargs('playlist_items'), sort_keys=True)}"
+
     @classmethod
     def fetch_tracks_json_from_playlist(cls, playlist_id: str) -> list:
         """
@@ -146,54 +234,35 @@ class NewTrackService():
             tracks: list
                 A tracks json data list gotten from the playlist.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': f'Fetch tracks json data from a playlist ({playlist_id}).',
             'status': 'Run',
             'message': ''
         })
         tracks_number = NewTrackService.fetch_playlist_track_number(playlist_id)
-        max_number = 100
-        tracks_json = []
 
         try:
             spotify = SpotifyModel()
-            while max_number < tracks_number:
-                offset = len(tracks_json)
-                playlist_items = spotify.conn.playlist_items(playlist_id, limit=100, offset=offset)
-                current_tracks_json = playlist_items['items']
-                tracks_json += current_tracks_json
-                tracks_number -= len(current_tracks_json)
-                logger_pro.debug({
-                    'action': f'Fetch tracks json data from a playlist ({playlist_id}).',
-                    'status': 'Success',
-                    'message': '',
-                    'data': {
-                        'offset': offset,
-                        'until': offset + len(current_tracks_json),
-                        'length': len(current_tracks_json)
-                    }
-                })
-            else:
-                # after while loop or less than 100 tracks
-                offset = len(tracks_json)
-                playlist_items = spotify.conn.playlist_items(playlist_id, limit=100, offset=offset)
-                current_tracks_json = playlist_items['items']
-                tracks_json += current_tracks_json
-                logger_pro.debug({
-                    'action': f'Fetch tracks json data from a playlist ({playlist_id}).',
-                    'status': 'Success',
-                    'message': '',
-                    'data': {
-                        'offset': offset,
-                        'until': offset + len(current_tracks_json),
-                        'length': len(current_tracks_json)
-                    }
-                })
+            paginator = Paginator(
+                lambda offset: spotify.conn.playlist_items(playlist_id, limit=100, offset=offset,
+                                                           **projection.kwargs('playlist_items'))['items'],
+                limit=100,
+                max_workers=setting.SPOTIFY_MAX_WORKERS)
+            tracks_json = paginator.fetch(tracks_number)
+            logger_pro.debug(lambda: {
+                'action': f'Fetch tracks json data from a playlist ({playlist_id}).',
+                'status': 'Success',
+                'message': '',
+                'data': {
+                    'pages_len': len(paginator.offsets(tracks_number)),
+                    'length': len(tracks_json)
+                }
+            })
         except Exception as e:
             logger_pro.error({
                 'action': f'Fetch tracks json data from a playlist ({playlist_id}).',
                 'status': 'Fail',
-                'message': 'This is in a while loop',
+                'message': '',
                 'exception': e,
                 'data': {
                     'playlist_id': playlist_id
@@ -223,16 +292,14 @@ class NewTrackService():
             track_number: int
                 The number of tracks in a playlist.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': f'Fetch a playlist track number. ({playlist_id}) ',
             'status': 'Run',
             'message': ''
         })
         try:
-            spotify = SpotifyModel()
-            playlist_data = spotify.conn.playlist(playlist_id)
-            track_number = playlist_data['tracks']['total']
-            logger_pro.debug({
+            track_number = PlaylistModel.fetch(playlist_id).total
+            logger_pro.debug(lambda: {
                 'action': f'Fetch a playlist track number. ({playlist_id}) ',
                 'status': 'Success',
                 'message': '',
@@ -273,16 +340,14 @@ class NewTrackService():
             playlist_name: str
                 A playlist name.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': f'Fetch a playlist name ({playlist_id}) ',
             'status': 'Run',
             'message': ''
         })
         try:
-            spotify = SpotifyModel()
-            playlist_data = spotify.conn.playlist(playlist_id)
-            playlist_name = playlist_data["name"]
-            logger_pro.debug({
+            playlist_name = PlaylistModel.fetch(playlist_id).name
+            logger_pro.debug(lambda: {
                 'action': f'Fetch a playlist name ({playlist_id}) ',
                 'status': 'Success',
                 'message': '',
@@ -323,16 +388,14 @@ class NewTrackService():
             playlist_url: str
                 A playlist url
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': f'Fetch a playlist url ({playlist_id}) ',
             'status': 'Run',
             'message': ''
         })
         try:
-            spotify = SpotifyModel()
-            playlist_data = spotify.conn.playlist(playlist_id)
-            playlist_url = playlist_data['external_urls']['spotify']
-            logger_pro.debug({
+            playlist_url = PlaylistModel.fetch(playlist_id).url
+            logger_pro.debug(lambda: {
                 'action': f'Fetch a playlist url ({playlist_id}) ',
                 'status': 'Success',
                 'message': '',
@@ -372,7 +435,7 @@ class NewTrackService():
             track: list
                 A track you are listening.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Fetch current track data from spotify',
             'status': 'Run',
             'message': ''
@@ -381,7 +444,7 @@ class NewTrackService():
         try:
             spotify = SpotifyModel()
             track_json = spotify.conn.current_user_recently_played()
-            logger_pro.debug({
+            logger_pro.debug(lambda: {
                 'action': 'Fetch current track data from spotify',
                 'status': 'Success',
                 'message': ''
@@ -442,7 +505,7 @@ class NewTrackService():
         return track_json
 
     @classmethod
-    def confirm_remove_tracks(cls, tracks: list) -> bool:
+    def confirm_remove_tracks(cls, tracks: list, assume_yes: bool = False) -> bool:
         """
             Confirm to remove tracks.
 
@@ -452,6 +515,8 @@ class NewTrackService():
             ----------
             tracks: list
                 A list of NewTrackModel instances to remove.
+            assume_yes: bool
+                Answer yes without asking, e.g. from the command line.
 
             Raises
             ------
@@ -464,7 +529,7 @@ class NewTrackService():
             ------
             Bool.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Confirm to remove tracks.',
             'status': 'Run',
             'message': ''
@@ -481,15 +546,26 @@ class NewTrackService():
 
         # Show tracks
         for i, t in enumerate(tracks, start=1):
-            logger_pro.debug(f'Track: [{i}] {t.name}')
+            logger_pro.debug(lambda: f'Track: [{i}] {t.name}')
             logger_con.debug(f'Track: [{i}] {t.name}')
 
+        if assume_yes:
+            logger_pro.info({
+                'action': 'Confirm to remove tracks.',
+                'status': 'Success',
+                'message': 'Assumed yes',
+                'data': {
+                    'tracks_len': len(tracks)
+                }
+            })
+            return True
+
         while True:
             # Confirm to remove
             q = 'Do you want to remove these tracks from playlist? (y/n): '
             user_input = input(q)
             if helper.is_yes(user_input):
-                logger_pro.debug({
+                logger_pro.debug(lambda: {
                     'action': 'Confirm to remove tracks.',
                     'status': 'Success',
                     'message': '',
@@ -497,7 +573,7 @@ class NewTrackService():
                 })
                 return True
             elif helper.is_no(user_input):
-                logger_pro.debug({
+                logger_pro.debug(lambda: {
                     'action': 'Confirm to remove tracks.',
                     'status': 'Success',
                     'message': '',
@@ -514,7 +590,7 @@ class NewTrackService():
                 continue
 
     @classmethod
-    def extract_track_dict_from_json(cls, track_json: list) -> dict:
+    def extract_track_dict_from_json(cls, track_json: list, clock: Clock = None) -> dict:
         """
             Extract track data from tracks json data.
 
@@ -522,6 +598,8 @@ class NewTrackService():
             ----------
             tracks_json_data: dict
                 A track json data.
+            clock: Clock
+                A clock which gives created_at. The run clock by default.
 
             Raises
             ------
@@ -533,24 +611,14 @@ class NewTrackService():
             track: dict
                 A track dict with certain keys
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Extract a track from tracks json data.',
             'status': 'Run',
             'message': ''
         })
         try:
-            track = {
-                'name': track_json['name'],
-                'artist': track_json['artists'][0]['name'],
-                'playlist_name': None,
-                'track_url': track_json['external_urls']['spotify'],
-                'playlist_url': None,
-                'release_date': track_json["album"]["release_date"],
-                'added_at': None,
-                'created_at': helper.get_date(),
-                'like': False
-            }
-            logger_pro.debug({
+            track = NewTrackModel.from_spotify_json(track_json, (clock or get_clock()).date).get_dict()
+            logger_pro.debug(lambda: {
                 'action': 'Extract a track from tracks json data.',
                 'status': 'Success',
                 'message': '',
@@ -591,18 +659,19 @@ class NewTrackService():
             tracks: list
                 A track dict of list added name and url.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Put playlist name and url to tracks dict',
             'status': 'Run',
             'message': ''
         })
         try:
-            p_name = NewTrackService.fetch_playlist_name(playlist_id)
-            p_url = NewTrackService.fetch_playlist_url(playlist_id)
+            playlist = PlaylistModel.fetch(playlist_id)
+            p_name = playlist.name
+            p_url = playlist.url
             for t in tracks_dict:
                 t['playlist_name'] = p_name
                 t['playlist_url'] = p_url
-            logger_pro.debug({
+            logger_pro.debug(lambda: {
                 'action': 'Put playlist name and url to tracks dict',
                 'status': 'Success',
                 'message': ''
@@ -648,7 +717,7 @@ class NewTrackService():
             duplicate_tracks: list
                 A duplicate track dict list.
         """
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Retrieve unique and duplicate tracks dict from tracks dict',
             'status': 'Run',
             'message': '',
@@ -678,17 +747,9 @@ class NewTrackService():
         duplicate_tracks = []
 
         try:
-            from_track_urls = [t['track_url'] for t in from_tracks]
-
-            for t in tracks:
-                if t['track_url'] in from_track_urls:
-                    duplicate_tracks.append(t)
-                    logger_pro.debug(f'Duplicate track: {t} by url')
-                else:
-                    unique_tracks.append(t)
-                    logger_pro.debug(f'Unique track: {t} by url')
+            unique_tracks, duplicate_tracks = TrackIndex(from_tracks).partition(tracks)
 
-            logger_pro.debug({
+            logger_pro.debug(lambda: {
                 'action': 'Retrieve unique and duplicate tracks dict from tracks dict',
                 'status': 'Success',
                 'message': '',
@@ -769,16 +830,8 @@ class NewTrackService():
         unique_tracks = []
         duplicate_tracks = []
         try:
-            from_track_urls = [t.track_url for t in from_tracks]
-
-            for t in tracks:
-                # If url is the same
-                if t.track_url in from_track_urls:
-                    duplicate_tracks.append(t)
-                    logger_pro.debug(f'Duplicate track: {vars(t)} by url')
-                else:
-                    unique_tracks.append(t)
-                    logger_pro.debug(f'Unique track: {vars(t)} by url')
+            # If track ID is the same
+            unique_tracks, duplicate_tracks = TrackIndex(from_tracks).partition(tracks)
 
             logger_pro.info({
                 'action': 'Retrieve unique and duplicate new track instances from tracks dict',
@@ -805,13 +858,17 @@ class NewTrackService():
             raise Exception
         return unique_tracks, duplicate_tracks
 
-    def add_new_tracks(self) -> None:
+    def add_new_tracks(self, dry_run: bool = False, history_index: TrackIndex = None) -> int:
         """
             Add new tracks to csv, gss, spotify playlist
 
             Parameters
             ----------
-            None
+            dry_run: bool
+                Find new tracks without adding them anywhere.
+            history_index: TrackIndex
+                An index of the track history kept by the caller, e.g. the daemon.
+                The added tracks are put on it. If None, the history is read.
 
             Raises
             ------
@@ -819,26 +876,29 @@ class NewTrackService():
 
             Return
             ------
-            None
+            new_tracks_len: int
+                The number of new tracks (to be) added.
         """
         spotify_repo = SpotifyNewTrackRepository()
-        csv_repo = CsvNewTrackRepository()
+        history_repo = NewTrackService.history_repository()
         gss_repo = GssNewTrackRepository()
 
         # Fetch tracks
         tracks_dict_spo = NewTrackService.fetch_tracks_dict_from_playlists()
 
         # Set tracks
-        tracks_spo = []
-        for t_dict in tracks_dict_spo:
-            t = NewTrackModel()
-            t.set_columns(t_dict)
-            tracks_spo.append(t)
+        tracks_spo = [NewTrackModel.from_dict(t_dict) for t_dict in tracks_dict_spo]
 
-        # Get tracks on csv
-        tracks_csv = csv_repo.all()
+        # Index tracks on the history while streaming it, so it is never held in memory
+        if history_index is None:
+            history_index = TrackIndex(history_repo.iter_all())
 
-        new_tracks, _ = NewTrackService.retrieve_unique_and_duplicate_tracks(tracks_spo, tracks_csv)
+        new_tracks, _ = history_index.partition(tracks_spo)
+
+        if dry_run:
+            for t in new_tracks:
+                logger_con.info(f'[dry-run] Add: {t.name} / {t.artist} ({t.playlist_name})')
+            return len(new_tracks)
 
         logger_pro.info({
             'action': 'Add new tracks to csv, gss, spotify playlist',
@@ -846,17 +906,19 @@ class NewTrackService():
             'message': ''
         })
 
-        for t in new_tracks:
-            spotify_repo.add(t)
-            csv_repo.add(t)
-            gss_repo.add(t)
-            logger_pro.info({
-                'action': 'Add new tracks to csv, gss, spotify playlist',
-                'status': 'Success',
-                'message': '',
-                'track': vars(t)
-            })
-        return None
+        spotify_repo.add_many(new_tracks)
+        history_repo.add_many(new_tracks)
+        gss_repo.add_many(new_tracks)
+        history_index.update(new_tracks)
+        logger_pro.info({
+            'action': 'Add new tracks to csv, gss, spotify playlist',
+            'status': 'Success',
+            'message': '',
+            'data': {
+                'new_tracks_len': len(new_tracks)
+            }
+        })
+        return len(new_tracks)
 
     def show_current_track(self) -> None:
         """
@@ -889,8 +951,8 @@ class NewTrackService():
         track_dict = NewTrackService.extract_track_dict_from_json(track_json)
 
         # Find playing track on csv
-        csv_repo = CsvNewTrackRepository()
-        track_csv = csv_repo.find_by_url(track_dict['track_url'])
+        history_repo = NewTrackService.history_repository()
+        track_csv = history_repo.find_by_url(track_dict['track_url'])
 
         # Show tracks
         logger_pro.info({
@@ -907,7 +969,7 @@ class NewTrackService():
                     'action': 'Show current track you are listening.',
                     'status': 'Success',
                     'message': 'Show a playing track with playlist name',
-                    'track_csv': vars(track_csv)
+                    'track_csv': track_csv.get_dict()
                 })
             except Exception as e:
                 logger_pro.error({
@@ -915,7 +977,7 @@ class NewTrackService():
                     'status': 'Fail',
                     'message': 'Show a playing track with playlist name',
                     'exception': e,
-                    'track_csv': vars(track_csv)
+                    'track_csv': track_csv.get_dict()
                 })
                 raise Exception
         else:
@@ -939,13 +1001,16 @@ class NewTrackService():
                 raise Exception
         return None
 
-    def remove_current_tracks(self) -> None:
+    def remove_current_tracks(self, assume_yes: bool = False, dry_run: bool = False) -> int:
         """
             Remove tracks you listened currently on Spotify.
 
             Parameters
             ----------
-            None.
+            assume_yes: bool
+                Remove without asking.
+            dry_run: bool
+                Find tracks to remove without removing them.
 
             Raises
             ------
@@ -954,7 +1019,8 @@ class NewTrackService():
 
             Return
             ------
-            None.
+            removed_tracks_len: int
+                The number of tracks (to be) removed.
         """
         # Fetch tracks json data you listened currently
         current_tracks_json = NewTrackService.fetch_current_tracks_json()
@@ -962,7 +1028,7 @@ class NewTrackService():
             m = 'There is no current tracks. So There is no tracks to remove on your playlist'
             logger_con.warning(m)
             logger_pro.warning(m)
-            return None
+            return 0
 
         # Extract tracks dict from json
         current_tracks_json = current_tracks_json['items']
@@ -973,8 +1039,7 @@ class NewTrackService():
             track_dict = NewTrackService.extract_track_dict_from_json(t)
 
             # Set dict data up New Track instance
-            track = NewTrackModel()
-            track.set_columns(track_dict)
+            track = NewTrackModel.from_dict(track_dict)
 
             # Show track
             logger_con.info(f'Curent Track: [{i}] {track.name}')
@@ -988,7 +1053,7 @@ class NewTrackService():
             m = 'There is no playlist tracks. So There is no tracks to remove on your playlist'
             logger_con.warning(m)
             logger_pro.warning(m)
-            return None
+            return 0
 
         # Retrieve duplicate tracks
         _, duplicate_tracks = NewTrackService.retrieve_unique_and_duplicate_tracks(playlist_tracks, current_tracks)
@@ -996,7 +1061,7 @@ class NewTrackService():
             m = 'There is no duplicate tracks. So There is no tracks to remove on your playlist'
             logger_con.warning(m)
             logger_pro.warning(m)
-            return None
+            return 0
 
         # Remove tracks from the playlist
         logger_pro.info({
@@ -1005,16 +1070,24 @@ class NewTrackService():
             'message': ''
         })
 
-        if NewTrackService.confirm_remove_tracks(duplicate_tracks):
+        if dry_run:
+            for t in duplicate_tracks:
+                logger_con.info(f'[dry-run] Remove: {t.name} / {t.artist}')
+            return len(duplicate_tracks)
+
+        if NewTrackService.confirm_remove_tracks(duplicate_tracks, assume_yes=assume_yes):
             try:
-                for t in duplicate_tracks:
-                    spotify_repo.delete_track(t)
+                results = spotify_repo.delete_many(duplicate_tracks)
+                failed_results = [r for r in results if r['status'] != 'Success']
+                if failed_results:
+                    raise Exception(f'{len(failed_results)} of {len(results)} chunks failed')
                 logger_pro.info({
                     'action': 'Remove tracks you listened currently on Spotify.',
                     'status': 'Success',
                     'message': '',
                     'data': {
-                        'deleted_tracks_len': len(duplicate_tracks)
+                        'deleted_tracks_len': len(duplicate_tracks),
+                        'results': results
                     }
                 })
             except Exception as e:
@@ -1036,10 +1109,12 @@ class NewTrackService():
                 'status': 'Warning',
                 'message': m
             })
+            return 0
 
-        return None
+        return len(duplicate_tracks)
 
-    def remove_tracks_by_index(self, first: int, last: int) -> None:
+    def remove_tracks_by_index(self, first: int, last: int,
+                               assume_yes: bool = False, dry_run: bool = False) -> int:
         """
             Remove tracks by index (first, last) you choose.
 
@@ -1049,6 +1124,10 @@ class NewTrackService():
                 The index number of playlist from.
             last: int
                 The index number of playlist until.
+            assume_yes: bool
+                Remove without asking.
+            dry_run: bool
+                Find tracks to remove without removing them.
 
             Raises
             ------
@@ -1057,7 +1136,8 @@ class NewTrackService():
 
             Return
             ------
-            None.
+            removed_tracks_len: int
+                The number of tracks (to be) removed.
         """
         # Fetch tracks from playlist
         spotify_repo = SpotifyNewTrackRepository()
@@ -1070,16 +1150,24 @@ class NewTrackService():
             'status': 'Run',
             'message': ''
         })
-        if NewTrackService.confirm_remove_tracks(tracks):
+        if dry_run:
+            for t in tracks:
+                logger_con.info(f'[dry-run] Remove: {t.name} / {t.artist}')
+            return len(tracks)
+
+        if NewTrackService.confirm_remove_tracks(tracks, assume_yes=assume_yes):
             try:
-                for t in tracks:
-                    spotify_repo.delete_track(t)
+                results = spotify_repo.delete_many(tracks)
+                failed_results = [r for r in results if r['status'] != 'Success']
+                if failed_results:
+                    raise Exception(f'{len(failed_results)} of {len(results)} chunks failed')
                 logger_pro.info({
                     'action': 'Remove tracks by index (first, last) you choose.',
                     'status': 'Success',
                     'message': '',
                     'data': {
-                        'deleted_tracks_len': len(tracks)
+                        'deleted_tracks_len': len(tracks),
+                        'results': results
                     }
                 })
             except Exception as e:
@@ -1099,7 +1187,62 @@ class NewTrackService():
                 'status': 'Warning',
                 'message': 'It was canceled.'
             })
-        return None
+            return 0
+        return len(tracks)
+
+    def export_history(self, path: str) -> int:
+        """
+            Export the track history to a CSV.
+
+            Parameters
+            ----------
+            path: str
+                A path of the CSV to write. '-' writes on stdout.
+
+            Raises
+            ------
+            Exception
+                If you can not export.
+
+            Return
+            ------
+            tracks_len: int
+                The number of tracks exported.
+        """
+        history_repo = NewTrackService.history_repository()
+        tracks_len = 0
+        try:
+            f = sys.stdout if path == '-' else open(path, 'w', newline='')
+            try:
+                writer = csv.writer(f)
+                writer.writerow(NewTrackModel.COLUMNS)
+                for t in history_repo.iter_all():
+                    writer.writerow(t.to_row())
+                    tracks_len += 1
+            finally:
+                if f is not sys.stdout:
+                    f.close()
+            logger_pro.info({
+                'action': 'Export the track history.',
+                'status': 'Success',
+                'message': '',
+                'data': {
+                    'path': path,
+                    'tracks_len': tracks_len
+                }
+            })
+        except Exception as e:
+            logger_pro.error({
+                'action': 'Export the track history.',
+                'status': 'Fail',
+                'message': '',
+                'exception': e,
+                'data': {
+                    'path': path
+                }
+            })
+            raise Exception
+        return tracks_len
 
     def toggle_like(self, status: bool) -> None:
         pass
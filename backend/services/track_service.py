@@ -4,8 +4,9 @@ from models.spotify import SpotifyModel
 from repositories.licked_track.csv import CsvLikedTrackRepository
 from repositories.licked_track.google_spreadsheet import GssLikedTrackRepository
 import utils.helper as helper
+from utils.logger import get_logger
 
-logger_pro = logging.getLogger('production')
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 
@@ -1,9 +1,10 @@
 import argparse
 
 parser = argparse.ArgumentParser()
+parser.add_argument("--env", help='optional')
 
-def get_env():    
-    parser.add_argument("--env", help='optional')
-    args = parser.parse_args()
+def get_env():
+    # Unknown arguments are left for the caller
+    args, _ = parser.parse_known_args()
     env = args.env
-    return env
\ No newline at end of file
+    return env
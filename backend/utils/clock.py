@@ -0,0 +1,96 @@
+"""Run clock which fixes the date of a run."""
+import datetime
+from contextlib import contextmanager
+
+JST = datetime.timezone(datetime.timedelta(hours=9), 'JST')
+
+
+class Clock():
+    """
+        A class used to represent the clock of a run.
+
+        The time is fixed when the run starts, so every track created
+        in the run has the same created_at and the date is formatted once.
+
+        Attributes
+        ----------
+        tz: datetime.timezone
+            The timezone of the clock.
+        now: datetime.datetime
+            The time the run started at.
+        date: str
+            The date the run started at, e.g. 2024-01-31.
+
+        Methods
+        ------
+    """
+    DATE_FORMAT = '%Y-%m-%d'
+
+    def __init__(self, now: datetime.datetime = None, tz: datetime.timezone = JST):
+        """
+            Parameters
+            ----------
+            now: datetime.datetime
+                The time to fix. The current time by default.
+            tz: datetime.timezone
+                The timezone of the clock. JST by default.
+        """
+        self.tz = tz
+        self.start(now)
+
+    def start(self, now: datetime.datetime = None) -> None:
+        """
+            Fix the time of a new run.
+
+            Parameters
+            ----------
+            now: datetime.datetime
+                The time to fix. The current time by default.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            None
+        """
+        self.now = now if now is not None else datetime.datetime.now(self.tz)
+        self.date = self.now.strftime(self.DATE_FORMAT)
+        return None
+
+    @contextmanager
+    def frozen(self, now: datetime.datetime):
+        """
+            Fix the time while in a with block, then put the previous time back.
+
+                with get_clock().frozen(datetime.datetime(2024, 1, 31, tzinfo=JST)):
+                    ...
+
+            Parameters
+            ----------
+            now: datetime.datetime
+                The time to fix.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            clock: Clock
+                The clock itself.
+        """
+        previous = self.now
+        self.start(now)
+        try:
+            yield self
+        finally:
+            self.start(previous)
+
+
+_clock = Clock()
+
+
+def get_clock() -> Clock:
+    return _clock
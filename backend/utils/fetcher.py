@@ -0,0 +1,343 @@
+"""Concurrent fetch engine and paginator for Spotify playlists."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from models.playlist import PlaylistModel
+import utils.projection as projection
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class Paginator():
+    """
+        A class used to fetch every page of a paged endpoint in parallel.
+
+        Since the total is known up front, every offset is computed
+        before the first request, the pages are fetched on a bounded
+        worker pool and put back together in order.
+
+        Attributes
+        ----------
+        fetch_page:
+            A callable which takes an offset and returns the items of the page.
+        limit: int
+            The number of items per page.
+        max_workers: int
+            The maximum number of requests running at the same time.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, fetch_page, limit: int = 100, max_workers: int = 8):
+        """
+            Parameters
+            ----------
+            fetch_page:
+                A callable which takes an offset and returns the items of the page.
+            limit: int
+                The number of items per page.
+            max_workers: int
+                The maximum number of requests running at the same time.
+        """
+        self.fetch_page = fetch_page
+        self.limit = limit
+        self.max_workers = max(1, int(max_workers))
+
+    def offsets(self, total: int, start: int = 0) -> list:
+        """
+            Compute the offset of every page.
+
+            Parameters
+            ----------
+            total: int
+                The number of items.
+            start: int
+                The offset of the first page to fetch.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            offsets: list
+                The offsets of the pages in order.
+        """
+        return list(range(start, total, self.limit))
+
+    def submit(self, executor, total: int, start: int = 0) -> list:
+        """
+            Submit every page to an executor.
+
+            Parameters
+            ----------
+            executor: concurrent.futures.Executor
+                An executor shared with other fetches.
+            total: int
+                The number of items.
+            start: int
+                The offset of the first page to fetch.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            futures: list
+                The futures of the pages in order.
+        """
+        return [executor.submit(self.fetch_page, offset) for offset in self.offsets(total, start)]
+
+    def fetch(self, total: int, start: int = 0) -> list:
+        """
+            Fetch every page in parallel and put them together in order.
+
+            Parameters
+            ----------
+            total: int
+                The number of items.
+            start: int
+                The offset of the first page to fetch.
+
+            Raises
+            ------
+            Exception
+                If any request fails.
+
+            Return
+            ------
+            items: list
+                The items of all the pages in order.
+        """
+        offsets = self.offsets(total, start)
+        if len(offsets) <= 1:
+            return [item for offset in offsets for item in self.fetch_page(offset)]
+
+        items = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(offsets))) as executor:
+            for page in executor.map(self.fetch_page, offsets):
+                items += page
+        return items
+
+    def fetch_partial(self, total: int, start: int = 0, retries: int = 1) -> tuple:
+        """
+            Fetch every page in parallel and keep the pages which succeed.
+
+            A page which fails is fetched again after the others,
+            up to retries more times. The pages which still fail are left out.
+
+            Parameters
+            ----------
+            total: int
+                The number of items.
+            start: int
+                The offset of the first page to fetch.
+            retries: int
+                The number of rounds to fetch the failed pages again.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            items: list
+                The items of the pages which succeeded, in order.
+            failed: list
+                The offsets of the pages which failed.
+        """
+        offsets = self.offsets(total, start)
+        pages = {}
+        errors = {}
+        pending = offsets
+        for attempt in range(retries + 1):
+            if not pending:
+                break
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                futures = [(offset, executor.submit(self.fetch_page, offset)) for offset in pending]
+                for offset, future in futures:
+                    try:
+                        pages[offset] = future.result()
+                        errors.pop(offset, None)
+                    except Exception as e:
+                        errors[offset] = e
+            pending = sorted(errors)
+
+        if errors:
+            logger_pro.warning({
+                'action': 'Fetch pages in parallel',
+                'status': 'Warning',
+                'message': 'Some pages failed after the retries',
+                'exception': next(iter(errors.values())),
+                'data': {
+                    'failed_offsets': sorted(errors),
+                    'pages_len': len(offsets)
+                }
+            })
+
+        items = [item for offset in offsets if offset in pages for item in pages[offset]]
+        return items, sorted(errors)
+
+
+class PlaylistFetcher():
+    """
+        A class used to fetch tracks json data from multiple playlists concurrently.
+
+        Every page of every playlist is fetched on one bounded thread pool,
+        and the result keeps the order of the playlist ids and of the pages,
+        so callers see the same data as the serial loop.
+
+        Attributes
+        ----------
+        conn:
+            An object to call Spotify API (spotipy.Spotify or a stub of it).
+        max_workers: int
+            The maximum number of requests running at the same time.
+        limit: int
+            The number of tracks fetched per page.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, conn, max_workers: int = 8, limit: int = 100):
+        """
+            Parameters
+            ----------
+            conn:
+                An object which has `playlist` and `playlist_items` methods.
+            max_workers: int
+                The maximum number of requests running at the same time.
+            limit: int
+                The number of tracks fetched per page.
+        """
+        self.conn = conn
+        self.max_workers = max(1, int(max_workers))
+        self.limit = limit
+
+    def fetch_total(self, playlist_id: str) -> int:
+        """
+            Fetch the number of tracks in a playlist.
+
+            Parameters
+            ----------
+            playlist_id: str
+                A playlist ID.
+
+            Raises
+            ------
+            Exception
+                If Spotify API fails.
+
+            Return
+            ------
+            total: int
+                The number of tracks in the playlist.
+        """
+        return PlaylistModel.fetch(playlist_id, self.conn).total
+
+    def fetch_playlists(self, playlist_ids: list) -> list:
+        """
+            Fetch the metadata of multiple playlists concurrently.
+
+            Parameters
+            ----------
+            playlist_ids: list
+                Playlist IDs.
+
+            Raises
+            ------
+            Exception
+                If Spotify API fails.
+
+            Return
+            ------
+            playlists: list
+                PlaylistModel instances in the same order as playlist_ids.
+        """
+        if not playlist_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(playlist_ids))) as executor:
+            return list(executor.map(lambda p_id: PlaylistModel.fetch(p_id, self.conn), playlist_ids))
+
+    def fetch_page(self, playlist_id: str, offset: int) -> list:
+        """
+            Fetch a page of tracks json data from a playlist.
+
+            Parameters
+            ----------
+            playlist_id: str
+                A playlist ID.
+            offset: int
+                The index of the first track of the page.
+
+            Raises
+            ------
+            Exception
+                If Spotify API fails.
+
+            Return
+            ------
+            tracks: list
+                A tracks json data list of the page.
+        """
+        playlist_items = self.conn.playlist_items(playlist_id, limit=self.limit, offset=offset,
+                                                  **projection.kwargs('playlist_items'))
+        return playlist_items['items']
+
+    def fetch(self, playlist_ids: list) -> list:
+        """
+            Fetch tracks json data from multiple playlists concurrently.
+
+            Parameters
+            ----------
+            playlist_ids: list
+                Playlist IDs to fetch tracks from.
+
+            Raises
+            ------
+            Exception
+                If any request fails.
+
+            Return
+            ------
+            tracks: list
+                A list of tracks json data lists, one per playlist,
+                in the same order as playlist_ids.
+        """
+        logger_pro.info({
+            'action': 'Fetch tracks json data from multiple playlists concurrently.',
+            'status': 'Run',
+            'message': '',
+            'data': {
+                'playlists_len': len(playlist_ids),
+                'max_workers': self.max_workers
+            }
+        })
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # The totals decide the offsets, so they are fetched first
+            totals = list(executor.map(self.fetch_total, playlist_ids))
+
+            pages = []
+            for i, (p_id, total) in enumerate(zip(playlist_ids, totals)):
+                paginator = Paginator(lambda offset, p_id=p_id: self.fetch_page(p_id, offset), limit=self.limit)
+                pages += [(i, future) for future in paginator.submit(executor, total)]
+
+            tracks_json = [[] for _ in playlist_ids]
+            for i, future in pages:
+                tracks_json[i] += future.result()
+
+        logger_pro.info({
+            'action': 'Fetch tracks json data from multiple playlists concurrently.',
+            'status': 'Success',
+            'message': '',
+            'data': {
+                'pages_len': len(pages)
+            }
+        })
+        return tracks_json
@@ -1,9 +1,11 @@
 import os
 import pathlib
-import datetime
 import logging
 
-logger_pro = logging.getLogger('production')
+from utils.clock import get_clock
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
 logger_con = logging.getLogger('console')
 
 def exists_file(path: str) -> bool:
@@ -24,7 +26,7 @@ def exists_file(path: str) -> bool:
     True/False
     """
 
-    logger_pro.debug({
+    logger_pro.debug(lambda: {
         'action': 'Confirm the path exists',
         'status': 'Run',
         'message': '',
@@ -34,7 +36,7 @@ def exists_file(path: str) -> bool:
     })
 
     if os.path.isfile(path):
-        logger_pro.debug({
+        logger_pro.debug(lambda: {
             'action': 'Confirm the path exists',
             'status': 'Success',
             'message': ''
@@ -112,8 +114,5 @@ def is_no(user_input):
     return False
 
 def get_date():
-    t_delta = datetime.timedelta(hours=9)
-    JST = datetime.timezone(t_delta, 'JST')
-    now = datetime.datetime.now(JST)
-    date = now.strftime('%Y-%m-%d')
-    return date
+    # The date of the run, see utils.clock
+    return get_clock().date
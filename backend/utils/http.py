@@ -0,0 +1,313 @@
+"""Pooled HTTP sessions shared by the API clients."""
+import atexit
+import functools
+import json
+import os
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+# Path segments followed by an ID, which is replaced by {id} on the stats
+ID_PARENTS = ('playlists', 'tracks', 'albums', 'artists', 'users', 'shows', 'episodes')
+
+# Query parameters which make Spotify send a projected response (utils.projection)
+PROJECTION_PARAMS = ('fields', 'market')
+
+_bytes = {}
+_bytes_lock = threading.Lock()
+
+# Sizes of unprojected responses, the baseline of the bytes saved by the projection
+_baseline = None
+_baseline_path = None
+_baseline_seen = {}
+
+
+def mount_pool(session, pool_size: int):
+    """
+        Mount a connection pool on a session.
+
+        Connections are kept alive and reused, so only the first request
+        to a host pays the TCP and TLS handshake.
+        Retries are left to utils.rate_limiter.
+
+        Parameters
+        ----------
+        session: requests.Session
+            A session to tune.
+        pool_size: int
+            The number of connections kept per host.
+            It should be at least the number of threads sharing the session.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        session: requests.Session
+            The session itself.
+    """
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0, pool_block=False)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def new_session(pool_size: int):
+    """
+        Create a keep-alive session with a connection pool.
+
+        Parameters
+        ----------
+        pool_size: int
+            The number of connections kept per host.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        session: requests.Session
+            A new session.
+    """
+    import requests
+
+    return mount_pool(requests.Session(), pool_size)
+
+
+@functools.lru_cache(maxsize=None)
+def lean_json_loads():
+    """
+        Get orjson.loads if orjson is installed.
+
+        orjson is optional. It decodes large responses several times faster
+        than the json module used by requests.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        loads:
+            orjson.loads, or None if it is not installed.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.loads
+
+
+def endpoint_of(url: str) -> str:
+    """
+        Get the endpoint of a url, with the IDs replaced by {id}.
+
+        Parameters
+        ----------
+        url: str
+            A request url, e.g. https://api.spotify.com/v1/playlists/37i9dQ/tracks?limit=100
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        endpoint: str
+            e.g. /v1/playlists/{id}/tracks
+    """
+    parts = urlsplit(url).path.split('/')
+    for i in range(1, len(parts)):
+        if parts[i - 1] in ID_PARENTS and parts[i] not in ('', 'tracks'):
+            parts[i] = '{id}'
+    return '/'.join(parts)
+
+
+def track_response(response, *args, **kwargs):
+    """
+        A requests response hook which counts the bytes of a response
+        and decodes JSON with orjson when it is installed.
+
+        Parameters
+        ----------
+        response: requests.Response
+            A response.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        response: requests.Response
+            The response itself.
+    """
+    # Reading the body here is free, the client reads it right after
+    size = len(response.content or b'')
+    endpoint = endpoint_of(response.url)
+    projected = is_projected(response.url)
+    with _bytes_lock:
+        counter = _bytes.setdefault(endpoint, {'calls': 0, 'bytes': 0, 'cached': 0,
+                                                  'projected': 0, 'projected_bytes': 0})
+        counter['calls'] += 1
+        # A body answered by utils.response_cache did not come over the wire
+        if getattr(response, 'from_cache', False):
+            counter['cached'] += 1
+        else:
+            counter['bytes'] += size
+            if projected:
+                counter['projected'] += 1
+                counter['projected_bytes'] += size
+            elif _baseline_path is not None and response.status_code == 200:
+                seen = _baseline_seen.setdefault(endpoint, {'calls': 0, 'bytes': 0})
+                seen['calls'] += 1
+                seen['bytes'] += size
+
+    json_loads = lean_json_loads()
+    if json_loads is not None and 'json' in response.headers.get('Content-Type', ''):
+        # orjson.JSONDecodeError is a ValueError, as the clients expect
+        response.json = lambda **kw: json_loads(response.content)
+    return response
+
+
+def is_projected(url: str) -> bool:
+    query = parse_qs(urlsplit(url).query)
+    return any(p in query for p in PROJECTION_PARAMS)
+
+
+def track_responses(session, baseline_path: str = None):
+    """
+        Count the bytes of every response of a session, per endpoint.
+
+        The sizes of unprojected responses (without fields= and market=,
+        e.g. with [SPOTIPY] PROJECTION = false) are saved as the baseline
+        at baseline_path when the process exits. Later runs report
+        the bytes the projection saves per call against it.
+
+        Parameters
+        ----------
+        session: requests.Session
+            A session to track.
+        baseline_path: str
+            A path of the baseline JSON. If None, no baseline is kept.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        session: requests.Session
+            The session itself.
+    """
+    global _baseline_path
+    if baseline_path is not None and _baseline_path is None:
+        _baseline_path = baseline_path
+        atexit.register(save_baseline)
+    session.hooks['response'].append(track_response)
+    return session
+
+
+def load_baseline() -> dict:
+    """
+        Read the baseline sizes, once per process.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        baseline: dict
+            endpoint -> calls and bytes of unprojected responses.
+    """
+    global _baseline
+    if _baseline is None:
+        _baseline = {}
+        if _baseline_path is not None:
+            try:
+                with open(_baseline_path, 'r') as f:
+                    _baseline = json.load(f)
+            except (OSError, ValueError):
+                _baseline = {}
+    return _baseline
+
+
+def save_baseline() -> None:
+    """
+        Save the sizes of the unprojected responses of this process as the baseline.
+
+        The endpoints seen in this process replace their old baseline.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        None
+    """
+    with _bytes_lock:
+        if _baseline_path is None or not _baseline_seen:
+            return None
+        baseline = dict(load_baseline())
+        baseline.update({endpoint: dict(seen) for endpoint, seen in _baseline_seen.items()})
+    try:
+        tmp_path = _baseline_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        os.replace(tmp_path, _baseline_path)
+    except OSError:
+        return None
+    return None
+
+
+def stats() -> dict:
+    """
+        Get the response sizes per endpoint.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        stats: dict
+            endpoint -> calls, bytes and bytes_per_call on the wire,
+            the number of calls answered by the response cache, and the calls and bytes
+            of projected calls.
+            With a baseline, also baseline_bytes_per_call (unprojected),
+            saved_bytes_per_call and saved_bytes for the projected calls.
+    """
+    baseline = load_baseline()
+    stats = {}
+    with _bytes_lock:
+        for endpoint, c in _bytes.items():
+            wire_calls = c['calls'] - c['cached']
+            stat = dict(c, bytes_per_call=c['bytes'] // wire_calls if wire_calls else 0)
+            base = baseline.get(endpoint)
+            if base and base.get('calls') and c['projected']:
+                stat['baseline_bytes_per_call'] = base['bytes'] // base['calls']
+                stat['saved_bytes_per_call'] = stat['baseline_bytes_per_call'] - c['projected_bytes'] // c['projected']
+                stat['saved_bytes'] = stat['saved_bytes_per_call'] * c['projected']
+            stats[endpoint] = stat
+    return stats
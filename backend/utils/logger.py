@@ -1,18 +1,125 @@
 """Portable Logger anywhere for import."""
+import atexit
 import logging.config
+import logging.handlers
+import queue
 import yaml
 import os
 
 
 class SetUpLogging():
+    # Loggers whose handlers write files, so they are moved behind a queue
+    QUEUED_LOGGERS = ('production', '')
+
     @staticmethod
-    def setup_logging(config_path, default_level=logging.info):
-        root_dir = os.path.dirname(os.path.abspath('__file__'))        
+    def setup_logging(config_path, default_level=logging.INFO, use_queue=True):
+        root_dir = os.path.dirname(os.path.abspath('__file__'))
         path = os.path.join(root_dir, config_path)
         if os.path.exists(path):
             with open(path, 'rt') as f:
                 config = yaml.safe_load(f.read())
                 logging.config.dictConfig(config)
                 logging.captureWarnings(True)
+            if use_queue:
+                for name in SetUpLogging.QUEUED_LOGGERS:
+                    SetUpLogging.start_queue(logging.getLogger(name))
         else:
-            logging.basicConfig(level=default_level)
\ No newline at end of file
+            logging.basicConfig(level=default_level)
+
+    @staticmethod
+    def start_queue(logger: logging.Logger) -> logging.handlers.QueueListener:
+        """
+            Move the handlers of a logger behind a QueueHandler.
+
+            The handlers run on the thread of a QueueListener,
+            so file I/O does not block the caller. The listener is stopped,
+            and the queue flushed, when the app exits.
+
+            Parameters
+            ----------
+            logger: logging.Logger
+                A logger set up by the config.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            listener: logging.handlers.QueueListener
+                The listener, or None if the logger has no handler.
+        """
+        handlers = [h for h in logger.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+        if not handlers:
+            return None
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        for h in handlers:
+            logger.removeHandler(h)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener.start()
+        atexit.register(listener.stop)
+        return listener
+
+
+class StructuredLogger():
+    """
+        A class used to log structured (dict) messages lazily.
+
+        A message can be a callable which returns the dict. It is called
+        only when the level is enabled, so a payload with a whole track list
+        costs nothing when DEBUG is off:
+
+            logger_pro.debug(lambda: {'action': ..., 'data': tracks})
+
+        Any other attribute is taken from the wrapped logger.
+
+        Attributes
+        ----------
+        logger: logging.Logger
+            The wrapped logger.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+
+    def __getattr__(self, name: str):
+        return getattr(self.logger, name)
+
+    def log(self, level: int, msg, *args, **kwargs) -> None:
+        self._log(level, msg, args, kwargs)
+
+    def debug(self, msg, *args, **kwargs) -> None:
+        self._log(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg, *args, **kwargs) -> None:
+        self._log(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg, *args, **kwargs) -> None:
+        self._log(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg, *args, **kwargs) -> None:
+        self._log(logging.ERROR, msg, args, kwargs)
+
+    def critical(self, msg, *args, **kwargs) -> None:
+        self._log(logging.CRITICAL, msg, args, kwargs)
+
+    def exception(self, msg, *args, exc_info=True, **kwargs) -> None:
+        self._log(logging.ERROR, msg, args, dict(kwargs, exc_info=exc_info))
+
+    def _log(self, level: int, msg, args: tuple, kwargs: dict) -> None:
+        if not self.logger.isEnabledFor(level):
+            return None
+        if callable(msg):
+            msg = msg()
+        # Report the caller of debug(), info() ... rather than this module
+        kwargs.setdefault('stacklevel', 3)
+        self.logger.log(level, msg, *args, **kwargs)
+        return None
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
@@ -0,0 +1,73 @@
+"""Response projection of Spotify API calls."""
+import utils.setting as setting
+
+
+# What NewTrackModel.from_spotify_json reads, and the track ids
+TRACK_FIELDS = 'name,id,artists(name),external_urls(spotify),album(release_date),linked_from(id,external_urls)'
+PLAYLIST_ITEMS_FIELDS = f'items(track({TRACK_FIELDS}))'
+
+# The endpoints which accept fields=
+FIELDS = {
+    'playlist_items': PLAYLIST_ITEMS_FIELDS
+}
+
+# The endpoints which accept market=
+MARKET_ENDPOINTS = ('playlist_items', 'current_user_saved_tracks')
+
+
+def kwargs(endpoint: str) -> dict:
+    """
+        Get the projection arguments of a Spotify call.
+
+        fields= keeps only the listed fields of the response.
+        market= makes Spotify drop available_markets, which is
+        most of a track object, and relink tracks to the market.
+        [SPOTIPY] PROJECTION = false turns both off.
+
+        Parameters
+        ----------
+        endpoint: str
+            The name of the spotipy method, e.g. 'playlist_items'.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        kwargs: dict
+            fields and market to pass to the method. Empty if it takes neither.
+    """
+    if not setting.SPOTIFY_PROJECTION:
+        return {}
+    projection = {}
+    if endpoint in FIELDS:
+        projection['fields'] = FIELDS[endpoint]
+    if endpoint in MARKET_ENDPOINTS and setting.SPOTIFY_MARKET:
+        projection['market'] = setting.SPOTIFY_MARKET
+    return projection
+
+
+def original(track_json: dict) -> dict:
+    """
+        Get the ids of a track as it is on the playlist or the library.
+
+        With market=, a track which is not playable in the market is relinked
+        to another track, and the original is kept on linked_from.
+        The original keeps the track url the same as without market=.
+
+        Parameters
+        ----------
+        track_json: dict
+            A track json data.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        track_json: dict
+            linked_from if the track is relinked, otherwise the track itself.
+    """
+    return track_json.get('linked_from') or track_json
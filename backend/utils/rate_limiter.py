@@ -0,0 +1,376 @@
+"""Rate limiter and retry scheduler shared by the API clients."""
+import logging
+import random
+import threading
+import time
+
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class TokenBucket():
+    """
+        A class used to represent a thread-safe token bucket.
+
+        Attributes
+        ----------
+        rate: float
+            The number of tokens added per second.
+        capacity: float
+            The maximum number of tokens (the burst size).
+
+        Methods
+        ------
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+            Take a token, waiting until one is available.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            waited: float
+                The seconds spent waiting for the token.
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        """
+            Drain the bucket so that nobody gets a token for a while.
+
+            This is used when the server asks to retry after some seconds,
+            since every caller shares the same quota.
+
+            Parameters
+            ----------
+            seconds: float
+                The seconds to hold back the tokens.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            None
+        """
+        with self.lock:
+            self.tokens = min(self.tokens, -seconds * self.rate)
+        return None
+
+
+class RateLimiter():
+    """
+        A class used to pace and retry the calls of an API client.
+
+        Every call takes a token from a token bucket. A call which fails with
+        a rate limit, a server error or a connection error is retried with
+        jittered exponential backoff, and Retry-After is honoured when the
+        server sends it. Counters are kept per endpoint.
+
+        Only the methods in IDEMPOTENT are retried on every error. The server
+        may have applied any other call (e.g. playlist_add_items) before the
+        error, so it is retried only when it was rate limited, which means
+        it was rejected.
+
+        Attributes
+        ----------
+        name: str
+            The name of the client.
+        bucket: TokenBucket
+            The token bucket shared by every call of the client.
+        max_retries: int
+            The maximum number of retries per call.
+        base_delay: float
+            The first backoff delay by second.
+        max_delay: float
+            The maximum backoff delay by second.
+
+        Methods
+        ------
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    RETRY_ERR_STATUSES = ('RESOURCE_EXHAUSTED', 'UNAVAILABLE', 'INTERNAL')
+    RATE_LIMIT_STATUSES = (429,)
+    RATE_LIMIT_ERR_STATUSES = ('RESOURCE_EXHAUSTED',)
+
+    # Reads, writes of a fixed range and removes of every occurrence,
+    # which leave the same result when they run twice
+    IDEMPOTENT = frozenset([
+        # Spotify
+        'playlist', 'playlist_items', 'current_user_saved_tracks',
+        'current_user_recently_played', 'current_user_playing_track',
+        'playlist_remove_all_occurrences_of_items',
+        # Google Spreadsheet
+        'open_by_key', 'worksheet', 'row_values', 'col_values',
+        'get_all_values', 'update', 'update_cell'
+    ])
+
+    def __init__(self, name: str, rate: float, burst: float, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def call(self, endpoint: str, func, *args, **kwargs):
+        """
+            Call a function of the client through the limiter.
+
+            Parameters
+            ----------
+            endpoint: str
+                The name of the endpoint used for the counters.
+            func:
+                The function to call.
+            *args, **kwargs:
+                The arguments of the function.
+
+            Raises
+            ------
+            Exception
+                The last exception if the call still fails after the retries,
+                or any exception which is not worth retrying.
+
+            Return
+            ------
+            result:
+                The result of the function.
+        """
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            self.count(endpoint, 'calls', 1)
+            self.count(endpoint, 'wait_sec', waited)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                retryable, retry_after = self.retry_info(e, idempotent=endpoint in self.IDEMPOTENT)
+                if not retryable or attempt >= self.max_retries:
+                    self.count(endpoint, 'errors', 1)
+                    raise
+
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                if retry_after is not None:
+                    delay = retry_after + random.uniform(0, self.base_delay)
+                    self.bucket.pause(retry_after)
+                attempt += 1
+                self.count(endpoint, 'retries', 1)
+                self.count(endpoint, 'backoff_sec', delay)
+                logger_pro.warning({
+                    'action': f'Call {self.name} API ({endpoint}).',
+                    'status': 'Retry',
+                    'message': f'retry {attempt}/{self.max_retries} after {delay:.1f} sec',
+                    'exception': e
+                })
+                time.sleep(delay)
+
+    def retry_info(self, err: Exception, idempotent: bool = True) -> tuple:
+        """
+            Decide whether an exception is worth retrying.
+
+            Parameters
+            ----------
+            err: Exception
+                An exception raised by the client.
+            idempotent: bool
+                The call can run twice safely. If not, only a rate limit is retried.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            retryable: bool
+                The call should be retried or no.
+            retry_after: float
+                The seconds the server asked to wait, or None.
+        """
+        # requests is loaded by the clients already, so importing it here is free
+        import requests
+
+        if isinstance(err, (ConnectionError, TimeoutError,
+                            requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return idempotent, None
+
+        # spotipy.SpotifyException has http_status and headers,
+        # gspread.exceptions.APIError has response
+        response = getattr(err, 'response', None)
+        status = getattr(err, 'http_status', None) or getattr(response, 'status_code', None)
+        headers = getattr(err, 'headers', None) or getattr(response, 'headers', None) or {}
+
+        statuses = self.RETRY_STATUSES if idempotent else self.RATE_LIMIT_STATUSES
+        err_statuses = self.RETRY_ERR_STATUSES if idempotent else self.RATE_LIMIT_ERR_STATUSES
+        retryable = status in statuses
+        if not retryable and response is not None:
+            try:
+                retryable = response.json()['error']['status'] in err_statuses
+            except Exception:
+                retryable = False
+
+        retry_after = None
+        try:
+            value = headers.get('Retry-After') or headers.get('retry-after')
+            if value is not None:
+                retry_after = min(self.max_delay, float(value))
+        except (AttributeError, TypeError, ValueError):
+            retry_after = None
+        return retryable, retry_after
+
+    def count(self, endpoint: str, key: str, value: float) -> None:
+        with self.lock:
+            counter = self.counters.setdefault(endpoint, {
+                'calls': 0,
+                'retries': 0,
+                'errors': 0,
+                'wait_sec': 0.0,
+                'backoff_sec': 0.0
+            })
+            counter[key] += value
+        return None
+
+    def stats(self) -> dict:
+        """
+            Get the counters per endpoint.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            stats: dict
+                A dict of endpoint to calls, retries, errors,
+                wait_sec (waiting for a token) and backoff_sec (waiting to retry).
+        """
+        with self.lock:
+            return {endpoint: dict(counter) for endpoint, counter in self.counters.items()}
+
+
+class RateLimitedProxy():
+    """
+        A class used to send every method call of a client through a RateLimiter.
+
+        Objects returned by a call are wrapped as well when they are
+        instances of wrap_types, e.g. the spreadsheets and worksheets of gspread.
+
+        Attributes
+        ----------
+        target:
+            The wrapped client.
+        limiter: RateLimiter
+            The limiter every call goes through.
+        wrap_types: tuple
+            The types of returned objects to wrap.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, target, limiter: RateLimiter, wrap_types: tuple = ()):
+        self._target = target
+        self._limiter = limiter
+        self._wrap_types = wrap_types
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = self._limiter.call(name, attr, *args, **kwargs)
+            if self._wrap_types and isinstance(result, self._wrap_types):
+                return RateLimitedProxy(result, self._limiter, self._wrap_types)
+            return result
+        return call
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, rate: float, burst: float, max_retries: int = 5) -> RateLimiter:
+    """
+        Get the limiter of a client, creating it on the first call.
+
+        Parameters
+        ----------
+        name: str
+            The name of the client.
+        rate: float
+            The number of calls per second.
+        burst: float
+            The number of calls allowed at once.
+        max_retries: int
+            The maximum number of retries per call.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        limiter: RateLimiter
+            The limiter shared by the client.
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(name, rate, burst, max_retries=max_retries)
+        return _limiters[name]
+
+
+def stats() -> dict:
+    """
+        Get the counters of every limiter.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        stats: dict
+            A dict of client name to its counters per endpoint.
+    """
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
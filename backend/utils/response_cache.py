@@ -0,0 +1,361 @@
+"""On-disk cache of Spotify responses, revalidated with ETags and snapshot_ids."""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import utils.setting as setting
+from utils.logger import get_logger
+
+logger_pro = get_logger('production')
+logger_con = logging.getLogger('console')
+
+
+class ResponseCache():
+    """
+        A class used to represent a size-bounded LRU cache on SQLite.
+
+        Every entry has a key, a tag which tells its version (an ETag or
+        a snapshot_id) and a value. When the values take more than max_bytes,
+        the least recently used entries are evicted.
+        A failure of the cache is logged and counted as a miss,
+        so it never stops a run.
+
+        Attributes
+        ----------
+        path: str
+            A path of the SQLite database.
+        max_bytes: int
+            The maximum size of the values.
+        size: int
+            The size of the values.
+        counters: dict
+            kind -> hits, misses, stores and evictions.
+
+        Methods
+        ------
+    """
+    SCHEMA = [
+        '''CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            tag TEXT,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            used_at REAL NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at)'
+    ]
+
+    SELECT = 'SELECT tag, value FROM entries WHERE key = ?'
+    TOUCH = 'UPDATE entries SET used_at = ? WHERE key = ?'
+    SELECT_SIZE = 'SELECT size FROM entries WHERE key = ?'
+    UPSERT = 'INSERT OR REPLACE INTO entries (key, tag, value, size, used_at) VALUES (?, ?, ?, ?, ?)'
+    SELECT_OLDEST = 'SELECT key, size FROM entries WHERE key != ? ORDER BY used_at LIMIT 1'
+    DELETE = 'DELETE FROM entries WHERE key = ?'
+
+    def __init__(self, path: str, max_bytes: int):
+        """
+            Parameters
+            ----------
+            path: str
+                A path of the SQLite database. ':memory:' keeps it in memory.
+            max_bytes: int
+                The maximum size of the values.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.counters = {}
+        # Pages are fetched on several threads, which share the connection
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            for statement in self.SCHEMA:
+                self.conn.execute(statement)
+        self.size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def get(self, key: str, tag: str = None) -> tuple:
+        """
+            Get an entry and mark it as used.
+
+            Parameters
+            ----------
+            key: str
+                A key of the entry.
+            tag: str
+                If set, an entry with another tag is a miss.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            tag: str
+                The tag of the entry, or None on a miss.
+            value: bytes
+                The value of the entry, or None on a miss.
+        """
+        try:
+            with self.lock:
+                row = self.conn.execute(self.SELECT, (key,)).fetchone()
+                if row is not None and (tag is None or row[0] == tag):
+                    with self.conn:
+                        self.conn.execute(self.TOUCH, (time.time(), key))
+                    return row[0], row[1]
+        except Exception as e:
+            self.warn('Read an entry of the response cache', e)
+        return None, None
+
+    def put(self, key: str, kind: str, tag: str, value: bytes) -> None:
+        """
+            Put an entry, evicting the least recently used entries if it gets too large.
+
+            Parameters
+            ----------
+            key: str
+                A key of the entry.
+            kind: str
+                The name of the counters.
+            tag: str
+                The version of the value.
+            value: bytes
+                The value.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            None
+        """
+        size = len(value)
+        if size > self.max_bytes:
+            return None
+        try:
+            with self.lock, self.conn:
+                row = self.conn.execute(self.SELECT_SIZE, (key,)).fetchone()
+                self.conn.execute(self.UPSERT, (key, tag, value, size, time.time()))
+                self.size += size - (row[0] if row else 0)
+                self.count(kind, 'stores')
+                while self.size > self.max_bytes:
+                    oldest = self.conn.execute(self.SELECT_OLDEST, (key,)).fetchone()
+                    if oldest is None:
+                        break
+                    self.conn.execute(self.DELETE, (oldest[0],))
+                    self.size -= oldest[1]
+                    self.count(kind, 'evictions')
+        except Exception as e:
+            self.warn('Write an entry of the response cache', e)
+        return None
+
+    def count(self, kind: str, name: str) -> None:
+        counter = self.counters.setdefault(kind, {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0})
+        counter[name] += 1
+        return None
+
+    def hit(self, kind: str) -> None:
+        with self.lock:
+            self.count(kind, 'hits')
+        return None
+
+    def miss(self, kind: str) -> None:
+        with self.lock:
+            self.count(kind, 'misses')
+        return None
+
+    def stats(self) -> dict:
+        """
+            Get the counters and the size of the cache.
+
+            Parameters
+            ----------
+            None
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            stats: dict
+                kind -> hits, misses, stores and evictions, and the size and max_bytes.
+        """
+        with self.lock:
+            stats = {kind: dict(c) for kind, c in self.counters.items()}
+            stats['size'] = self.size
+            stats['max_bytes'] = self.max_bytes
+        return stats
+
+    def warn(self, action: str, err: Exception) -> None:
+        logger_pro.warning({
+            'action': action,
+            'status': 'Warning',
+            'message': 'Treated as a miss',
+            'exception': err,
+            'data': {
+                'path': self.path
+            }
+        })
+        return None
+
+    def get_json(self, key: str, kind: str, tag: str):
+        _, value = self.get(key, tag)
+        if value is None:
+            self.miss(kind)
+            return None
+        self.hit(kind)
+        return json.loads(value)
+
+    def put_json(self, key: str, kind: str, tag: str, data) -> None:
+        self.put(key, kind, tag, json.dumps(data, ensure_ascii=False).encode())
+        return None
+
+
+class ConditionalAdapter():
+    """
+        A class used to revalidate GET responses with If-None-Match.
+
+        It wraps the transport adapter of a requests session. A GET response
+        which has an ETag is cached. The next GET of the same url sends
+        If-None-Match, and a 304 Not Modified is answered with the cached body,
+        so the client sees a normal 200.
+        The response has from_cache = True, which utils.http counts.
+
+        Attributes
+        ----------
+        adapter: requests.adapters.BaseAdapter
+            The wrapped adapter.
+        cache: ResponseCache
+            The cache of the bodies.
+
+        Methods
+        ------
+    """
+    KIND = 'etag'
+
+    def __init__(self, adapter, cache: ResponseCache):
+        self.adapter = adapter
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return self.adapter.send(request, **kwargs)
+
+        key = 'GET ' + request.url
+        etag, body = self.cache.get(key)
+        if etag:
+            request.headers['If-None-Match'] = etag
+        response = self.adapter.send(request, **kwargs)
+
+        if response.status_code == 304 and body is not None:
+            response.content  # Release the connection of the empty 304
+            response.status_code = 200
+            response.reason = 'OK'
+            response._content = body
+            response.headers.setdefault('Content-Type', 'application/json')
+            response.from_cache = True
+            self.cache.hit(self.KIND)
+            return response
+
+        self.cache.miss(self.KIND)
+        new_etag = response.headers.get('ETag')
+        if response.status_code == 200 and new_etag and 'json' in response.headers.get('Content-Type', ''):
+            self.cache.put(key, self.KIND, new_etag, response.content)
+        return response
+
+    def close(self) -> None:
+        self.adapter.close()
+        return None
+
+
+def cache_responses(session, cache: ResponseCache):
+    """
+        Put a ConditionalAdapter in front of every adapter of a session.
+
+        Parameters
+        ----------
+        session: requests.Session
+            A session to cache.
+        cache: ResponseCache
+            The cache of the bodies.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        session: requests.Session
+            The session itself.
+    """
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, ConditionalAdapter):
+            session.adapters[prefix] = ConditionalAdapter(adapter, cache)
+    return session
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """
+        Get the response cache of the app, opening it on the first call.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        cache: ResponseCache
+            The cache at [HTTP] CACHE_FILE, or None if [HTTP] CACHE is off
+            or the cache can not be opened.
+    """
+    global _cache
+    if not setting.HTTP_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ResponseCache(setting.HTTP_CACHE_PATH, setting.HTTP_CACHE_MAX_BYTES)
+            except Exception as e:
+                logger_pro.warning({
+                    'action': 'Open the response cache',
+                    'status': 'Warning',
+                    'message': 'Run without the cache',
+                    'exception': e,
+                    'data': {
+                        'path': setting.HTTP_CACHE_PATH
+                    }
+                })
+                return None
+        return _cache
+
+
+def stats() -> dict:
+    """
+        Get the counters of the response cache.
+
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        stats: dict
+            The stats of the cache, or None if it is not open.
+    """
+    return _cache.stats() if _cache is not None else None
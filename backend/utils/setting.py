@@ -1,25 +1,110 @@
+"""
+Settings of the app.
+
+config/config.ini and the command line are read on the first access of a setting
+(PEP 562 module __getattr__), not when the module is imported,
+so importing a module which uses the settings costs nothing.
+"""
 from configparser import ConfigParser
 
 import utils.arguments as arguments
 
 # Set up config as dict
-config_file = 'config/config.ini'
-CONFIG = ConfigParser()
-CONFIG.read(config_file)
+CONFIG_FILE = 'config/config.ini'
 
-# Environment
-ENV = CONFIG['APP']['ENV']
-arg_env = arguments.get_env()
-if arg_env == 'dev':
-    ENV = arg_env
+# Log config
+LOG_CONFIG_PATH = "config/logging_config.yaml"
 
-# Google Spreadsheet
-AUTHENTICATION_JSON = CONFIG['GOOGLE_API']['JSONF_DIR'] + CONFIG['GOOGLE_API']['JSON_FILE']
 
-# CSV
-DIR_PATH_OF_CSV = CONFIG['FILES']['DIR_CSV']
-FILE_PATH_OF_CSV = CONFIG['FILES']['DIR_CSV'] + CONFIG['FILES']['FILENAME_OF_CSV']
-FILE_PATH_OF_CSV_TEST = CONFIG['FILES']['DIR_CSV'] + CONFIG['FILES']['FILENAME_OF_CSV_TEST']
+def load() -> dict:
+    """
+        Read the config and the command line and build the settings.
 
-# Log config
-LOG_CONFIG_PATH = "config/logging_config.yaml"
\ No newline at end of file
+        Parameters
+        ----------
+        None
+
+        Raises
+        ------
+        KeyError
+            If the config does not have a required section or key.
+
+        Return
+        ------
+        settings: dict
+            A dict of setting name to value.
+    """
+    CONFIG = ConfigParser()
+    CONFIG.read(CONFIG_FILE)
+
+    # Environment
+    ENV = CONFIG['APP']['ENV']
+    arg_env = arguments.get_env()
+    if arg_env == 'dev':
+        ENV = arg_env
+
+    return {
+        'CONFIG': CONFIG,
+        'ENV': ENV,
+
+        # Spotify
+        'SPOTIFY_MAX_WORKERS': CONFIG.getint('SPOTIPY', 'MAX_WORKERS', fallback=8),
+        'SPOTIFY_TOKEN_CACHE': CONFIG['FILES']['DIR_SRC'] + CONFIG.get('SPOTIPY', 'TOKEN_CACHE', fallback='.spotify_token_cache'),
+        # Seconds before expiry to refresh the token
+        'SPOTIFY_TOKEN_REFRESH_MARGIN': CONFIG.getint('SPOTIPY', 'TOKEN_REFRESH_MARGIN', fallback=300),
+
+        # Ask Spotify only for the fields the app reads (fields= and market=)
+        'SPOTIFY_PROJECTION': CONFIG.getboolean('SPOTIPY', 'PROJECTION', fallback=True),
+        # A market code, or from_token for the market of the user. Empty sends no market
+        'SPOTIFY_MARKET': CONFIG.get('SPOTIPY', 'MARKET', fallback='from_token'),
+
+        # Connections kept alive per host and client
+        'HTTP_POOL_SIZE': CONFIG.getint('HTTP', 'POOL_SIZE', fallback=16),
+        # Sizes of unprojected responses, to report the bytes saved by the projection
+        'HTTP_BASELINE_PATH': CONFIG['FILES']['DIR_SRC'] + CONFIG.get('HTTP', 'BASELINE_FILE', fallback='http_baseline.json'),
+        # On-disk cache of Spotify responses (ETags and playlist snapshots)
+        'HTTP_CACHE': CONFIG.getboolean('HTTP', 'CACHE', fallback=True),
+        'HTTP_CACHE_PATH': CONFIG['FILES']['DIR_SRC'] + CONFIG.get('HTTP', 'CACHE_FILE', fallback='http_cache.sqlite3'),
+        'HTTP_CACHE_MAX_BYTES': CONFIG.getint('HTTP', 'CACHE_MAX_MB', fallback=32) * 1024 * 1024,
+
+        # Rate limit (calls per second, calls allowed at once)
+        'SPOTIFY_RATE': CONFIG.getfloat('RATE_LIMIT', 'SPOTIFY_RATE', fallback=10),
+        'SPOTIFY_BURST': CONFIG.getfloat('RATE_LIMIT', 'SPOTIFY_BURST', fallback=10),
+        'GSS_RATE': CONFIG.getfloat('RATE_LIMIT', 'GSS_RATE', fallback=1),
+        'GSS_BURST': CONFIG.getfloat('RATE_LIMIT', 'GSS_BURST', fallback=5),
+        'MAX_RETRIES': CONFIG.getint('RATE_LIMIT', 'MAX_RETRIES', fallback=5),
+
+        # Google Spreadsheet
+        'AUTHENTICATION_JSON': CONFIG['GOOGLE_API']['JSONF_DIR'] + CONFIG['GOOGLE_API']['JSON_FILE'],
+
+        # CSV
+        'DIR_PATH_OF_CSV': CONFIG['FILES']['DIR_CSV'],
+        'FILE_PATH_OF_CSV': CONFIG['FILES']['DIR_CSV'] + CONFIG['FILES']['FILENAME_OF_CSV'],
+        'FILE_PATH_OF_CSV_TEST': CONFIG['FILES']['DIR_CSV'] + CONFIG['FILES']['FILENAME_OF_CSV_TEST'],
+
+        # Track history store: csv or sqlite
+        'TRACK_STORE': CONFIG.get('APP', 'TRACK_STORE', fallback='csv'),
+
+        # Daemon (minutes between runs, 0 disables a job)
+        'DAEMON_ADD_NEW_INTERVAL_MIN': CONFIG.getfloat('DAEMON', 'ADD_NEW_INTERVAL_MIN', fallback=60),
+        'DAEMON_SYNC_LIKED_INTERVAL_MIN': CONFIG.getfloat('DAEMON', 'SYNC_LIKED_INTERVAL_MIN', fallback=360),
+        # Every n-th sync-liked ignores the watermark, 0 never does
+        'DAEMON_SYNC_LIKED_FULL_EVERY': CONFIG.getint('DAEMON', 'SYNC_LIKED_FULL_EVERY', fallback=24),
+        'DAEMON_HOST': CONFIG.get('DAEMON', 'HOST', fallback='127.0.0.1'),
+        'DAEMON_PORT': CONFIG.getint('DAEMON', 'PORT', fallback=8765),
+
+        # SQLite
+        'FILE_PATH_OF_SQLITE': CONFIG['FILES']['DIR_SRC'] + CONFIG.get('FILES', 'FILENAME_OF_SQLITE', fallback='tracks.sqlite3'),
+        'FILE_PATH_OF_SQLITE_TEST': CONFIG['FILES']['DIR_SRC'] + CONFIG.get('FILES', 'FILENAME_OF_SQLITE_TEST', fallback='tracks_test.sqlite3'),
+    }
+
+
+def __getattr__(name: str):
+    if name.startswith('__'):
+        raise AttributeError(name)
+    settings = load()
+    # Keep them as module globals, so this runs only once
+    globals().update(settings)
+    if name not in settings:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return settings[name]
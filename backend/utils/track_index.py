@@ -0,0 +1,315 @@
+"""Hash indexes of tracks keyed by normalized Spotify track ID or by track identity."""
+from urllib.parse import urlsplit
+
+
+def track_id_from_url(url: str) -> str:
+    """
+        Normalize a track url into a track ID.
+
+        It accepts an open.spotify.com url (with or without a locale prefix
+        and query string) and a spotify:track: uri. Anything else is
+        returned without its query string and trailing slash.
+
+        Parameters
+        ----------
+        url: str
+            A track url.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        track_id: str
+            The normalized track ID.
+    """
+    if not url:
+        return ''
+    # Fast path for the usual https://open.spotify.com/track/<id>?si=...
+    i = url.find('/track/')
+    if i != -1:
+        track_id = url[i + 7:].split('?', 1)[0].split('#', 1)[0].split('/', 1)[0]
+        if track_id:
+            return track_id.strip()
+
+    url = url.strip()
+    if url.startswith('spotify:'):
+        parts = url.split(':')
+    else:
+        parts = urlsplit(url).path.split('/')
+    parts = [p for p in parts if p]
+    if 'track' in parts:
+        i = parts.index('track')
+        if i + 1 < len(parts):
+            return parts[i + 1]
+    return url.split('?')[0].split('#')[0].rstrip('/')
+
+
+def url_of(track) -> str:
+    """
+        Get the track url of a track dict or a track instance.
+
+        Parameters
+        ----------
+        track: dict or NewTrackModel
+            A track.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        url: str
+            The track url.
+    """
+    if isinstance(track, dict):
+        return track['track_url']
+    return track.track_url
+
+
+class TrackIndex():
+    """
+        A class used to represent a set of tracks keyed by track ID.
+
+        Membership checks are O(1), so partitioning n tracks against
+        a history of m tracks is O(n + m) instead of O(n * m).
+
+        Attributes
+        ----------
+        key:
+            A callable which returns the track url of a track.
+        ids: set
+            The normalized track IDs in the index.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, tracks=(), key=url_of):
+        """
+            Parameters
+            ----------
+            tracks: iterable
+                Tracks (dicts or instances) to index. It can be a generator.
+            key:
+                A callable which returns the track url of a track.
+        """
+        self.key = key
+        self.ids = set()
+        self.update(tracks)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, track) -> bool:
+        return track_id_from_url(self.key(track)) in self.ids
+
+    def add(self, track) -> None:
+        self.ids.add(track_id_from_url(self.key(track)))
+        return None
+
+    def update(self, tracks) -> None:
+        key = self.key
+        self.ids.update(track_id_from_url(key(t)) for t in tracks)
+        return None
+
+    def has_url(self, url: str) -> bool:
+        return track_id_from_url(url) in self.ids
+
+    def partition(self, tracks) -> tuple:
+        """
+            Split tracks into the ones not in the index and the ones in it.
+
+            Parameters
+            ----------
+            tracks: iterable
+                Tracks to check. They must work with the key of the index.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            unique_tracks: list
+                Tracks not in the index, in the input order.
+            duplicate_tracks: list
+                Tracks in the index, in the input order.
+        """
+        ids = self.ids
+        key = self.key
+        unique_tracks = []
+        duplicate_tracks = []
+        for t in tracks:
+            if track_id_from_url(key(t)) in ids:
+                duplicate_tracks.append(t)
+            else:
+                unique_tracks.append(t)
+        return unique_tracks, duplicate_tracks
+
+
+def track_id_of(url: str) -> str:
+    """
+        Get the track ID of a url only if it points to a track.
+
+        Parameters
+        ----------
+        url: str
+            A url, e.g. of a track or of an album.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        track_id: str
+            The track ID, or '' if the url is not a track url.
+    """
+    if not url or ('/track/' not in url and not url.startswith('spotify:track:')):
+        return ''
+    return track_id_from_url(url)
+
+
+def normalize(text) -> str:
+    """
+        Normalize a name or an artist for matching.
+
+        It is lowercased and every character which is not a letter or a digit
+        (in any script) is dropped, so "Song (Remix)" matches "song remix".
+        An artist list is joined, so ['a', 'b'], "a, b" and "['a', 'b']" match.
+
+        Parameters
+        ----------
+        text: str or list
+            A name, an artist or a list of artists.
+
+        Raises
+        ------
+        None
+
+        Return
+        ------
+        normalized: str
+            The normalized text.
+    """
+    if isinstance(text, (list, tuple)):
+        text = ''.join(text)
+    return ''.join(c for c in str(text or '').lower() if c.isalnum())
+
+
+class TrackIdentityIndex():
+    """
+        A class used to represent a set of tracks keyed by their identity.
+
+        The identity of a track is its track ID. A track without one,
+        e.g. a row written with an album url, falls back to its normalized
+        name and artist. A track is in the index if its track ID is,
+        or if its name and artist match a track indexed without a track ID.
+        Every check is O(1), so a diff of n tracks against m is O(n + m).
+
+        Attributes
+        ----------
+        fields: tuple
+            The keys of the url, the name and the artist on a track dict.
+        ids: set
+            The track IDs in the index.
+        fallback_keys: set
+            (name, artist) normalized of the tracks indexed without a track ID.
+
+        Methods
+        ------
+    """
+
+    def __init__(self, tracks=(), fields: tuple = ('url', 'name', 'artist')):
+        """
+            Parameters
+            ----------
+            tracks: iterable
+                Track dicts to index. It can be a generator.
+            fields: tuple
+                The keys of the url, the name and the artist on a track dict.
+        """
+        self.fields = fields
+        self.ids = set()
+        self.fallback_keys = set()
+        self.update(tracks)
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.fallback_keys)
+
+    def __contains__(self, track: dict) -> bool:
+        track_id = track_id_of(track.get(self.fields[0]))
+        if track_id and track_id in self.ids:
+            return True
+        # The name and artist are only normalized when there is a row to match
+        return bool(self.fallback_keys) and self.fallback_key(track) in self.fallback_keys
+
+    def fallback_key(self, track: dict) -> tuple:
+        """
+            Get the name and artist key of a track.
+
+            Parameters
+            ----------
+            track: dict
+                A track dict.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            key: tuple
+                (name, artist) normalized.
+        """
+        _, name, artist = self.fields
+        return normalize(track.get(name)), normalize(track.get(artist))
+
+    def add(self, track: dict) -> None:
+        track_id = track_id_of(track.get(self.fields[0]))
+        if track_id:
+            self.ids.add(track_id)
+        else:
+            self.fallback_keys.add(self.fallback_key(track))
+        return None
+
+    def update(self, tracks) -> None:
+        for t in tracks:
+            self.add(t)
+        return None
+
+    def partition(self, tracks) -> tuple:
+        """
+            Split tracks into the ones not in the index and the ones in it.
+
+            A track repeated in the input is unique only the first time.
+
+            Parameters
+            ----------
+            tracks: iterable
+                Track dicts to check.
+
+            Raises
+            ------
+            None
+
+            Return
+            ------
+            unique_tracks: list
+                Tracks not in the index, in the input order.
+            duplicate_tracks: list
+                Tracks in the index, in the input order.
+        """
+        seen = TrackIdentityIndex(fields=self.fields)
+        unique_tracks = []
+        duplicate_tracks = []
+        for t in tracks:
+            if t in self or t in seen:
+                duplicate_tracks.append(t)
+            else:
+                unique_tracks.append(t)
+                seen.add(t)
+        return unique_tracks, duplicate_tracks